@@ -0,0 +1,75 @@
+"""Пропускная способность JSON API против HTML-ленты.
+
+Страница одного размера, открытая по курсору: HTML с холодным кэшем
+карточек и страниц, HTML с прогретыми карточками и JSON API.
+
+Запуск из корня репозитория:
+
+    python benchmarks/bench_api.py
+"""
+from itertools import count
+
+from common import per_call_ms, populate, setup_django, test_database
+
+setup_django()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from blog.const import POSTS_RELEASE_LIMIT  # noqa: E402
+from blog.paginators import encode_cursor  # noqa: E402
+
+POSTS = 500
+REPEAT = 200
+
+
+def count_queries(func):
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    return len(ctx.captured_queries)
+
+
+def main():
+    with test_database():
+        posts = populate(POSTS)
+        middle = posts[POSTS // 2]
+        cursor = encode_cursor(middle.pub_date, middle.pk)
+        client = Client()
+        html_url = f'/?before={cursor}'
+        api_url = f'/api/posts/?limit={POSTS_RELEASE_LIMIT}&cursor={cursor}'
+
+        def html_cold():
+            cache.clear()
+            client.get(html_url)
+
+        calls = count()
+
+        def html_warm_cards():
+            # Новый URL минует кэш страниц, карточки остаются в кэше.
+            client.get(html_url, {'nocache': next(calls)})
+
+        def api():
+            return b''.join(client.get(api_url).streaming_content)
+
+        api()
+        html_cold()
+        html_warm_cards()
+        results = [
+            ('HTML, холодный кэш', html_cold),
+            ('HTML, карточки в кэше', html_warm_cards),
+            ('JSON API', api),
+        ]
+        api_ms = per_call_ms(api, REPEAT)
+        for title, func in results:
+            ms = api_ms if func is api else per_call_ms(func, REPEAT)
+            print(
+                f'{title:<25} {ms:7.3f} мс, {1000 / ms:7.0f} запр./с,'
+                f' SQL-запросов: {count_queries(func)},'
+                f' x{ms / api_ms:.1f} от API'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Пропускная способность лент под WSGI и ASGI при медленных клиентах.
+
+WSGI: пул из WORKERS потоков, поток занят, пока клиент читает ответ.
+ASGI: асинхронные представления, чтение ответа клиентом - ожидание
+в цикле событий, а не занятый поток. Запросы подаются в приложения
+напрямую, без сетевого сервера: сравнивается только путь Django.
+
+Запуск из корня репозитория:
+
+    python benchmarks/bench_async.py
+"""
+import asyncio
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import populate, setup_django, test_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.urls import clear_url_caches  # noqa: E402
+
+POSTS = 200
+REQUESTS = 200
+WORKERS = 4
+CONNECTIONS = 50
+# Сколько медленный клиент читает ответ, в секундах.
+CLIENT_DELAY = 0.05
+
+
+def use_async_views(enabled):
+    import blog.urls
+    import blogicum.urls
+
+    settings.BLOG_ASYNC_VIEWS = enabled
+    importlib.reload(blog.urls)
+    importlib.reload(blogicum.urls)
+    clear_url_caches()
+
+
+def get_paths():
+    # Разные URL обходят кэш страниц, карточки постов остаются в кэше.
+    return [f'/?page={i % 10 + 1}&n={i}' for i in range(REQUESTS)]
+
+
+def run_wsgi(paths):
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    def request(path):
+        environ = factory.get(path).environ
+        body = handler(environ, lambda status, headers: None)
+        try:
+            for _ in body:
+                pass
+            time.sleep(CLIENT_DELAY)
+        finally:
+            body.close()
+
+    with ThreadPoolExecutor(WORKERS) as pool:
+        list(pool.map(request, paths))
+
+
+async def run_asgi(paths):
+    handler = ASGIHandler()
+    connections = asyncio.Semaphore(CONNECTIONS)
+
+    async def request(path):
+        path, query = path.split('?')
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query.encode(),
+            'headers': [(b'host', b'testserver')],
+            'server': ('testserver', 80),
+        }
+
+        messages = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Клиент не отключается, пока не прочитает ответ.
+            await asyncio.Future()
+
+        async def send(message):
+            if (message['type'] == 'http.response.body'
+                    and not message.get('more_body')):
+                await asyncio.sleep(CLIENT_DELAY)
+
+        async with connections:
+            await handler(scope, receive, send)
+
+    await asyncio.gather(*(request(path) for path in paths))
+
+
+def measure(title, func):
+    started = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - started
+    print(f'{title:<40} {REQUESTS / seconds:7.0f} запр./с')
+
+
+def main():
+    with test_database():
+        populate(POSTS)
+        paths = get_paths()
+        use_async_views(False)
+        run_wsgi(paths[:10])
+        measure(
+            f'WSGI, синхронные, {WORKERS} потока', lambda: run_wsgi(paths)
+        )
+        asyncio.run(run_asgi(paths[:10]))
+        measure(
+            f'ASGI, синхронные, {CONNECTIONS} соединений',
+            lambda: asyncio.run(run_asgi(paths)),
+        )
+        use_async_views(True)
+        asyncio.run(run_asgi(paths[:10]))
+        measure(
+            f'ASGI, асинхронные, {CONNECTIONS} соединений',
+            lambda: asyncio.run(run_asgi(paths)),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Время сохранения поста с изображением: нарезка в запросе или в очереди.
+
+В запросе: копии создаются до ответа, как делал Post.save раньше.
+В очереди: сохраняется только оригинал и задача ImageJob.
+
+Запуск из корня репозитория:
+
+    python benchmarks/bench_image_upload.py
+"""
+import tempfile
+from io import BytesIO
+
+from common import per_call_ms, populate, setup_django, test_database
+
+setup_django()
+
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from blog.images import generate_variants  # noqa: E402
+
+REPEAT = 5
+SIZES = ((800, 600), (2400, 1600), (6000, 4000))
+
+
+def make_upload(width, height):
+    buffer = BytesIO()
+    Image.effect_noise((width, height), 64).convert('RGB').save(
+        buffer, 'JPEG'
+    )
+    return buffer.getvalue()
+
+
+def save_post(post, data, inline):
+    post.image = SimpleUploadedFile('photo.jpg', data, 'image/jpeg')
+    post.save()
+    if inline:
+        generate_variants(post.image.storage, post.image.name)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as media, \
+            override_settings(MEDIA_ROOT=media), test_database():
+        (post,) = populate(1)
+        for width, height in SIZES:
+            data = make_upload(width, height)
+            inline = per_call_ms(lambda: save_post(post, data, True), REPEAT)
+            queued = per_call_ms(lambda: save_post(post, data, False), REPEAT)
+            print(
+                f'{width}x{height:<12} в запросе {inline:8.1f} мс,'
+                f' в очереди {queued:6.1f} мс'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Сравнение рендера текста поста и комментариев: фильтр или готовый HTML.
+
+Запуск из корня репозитория:
+
+    python benchmarks/bench_text_render.py
+"""
+import timeit
+
+from common import setup_django
+
+setup_django()
+
+from django.template import Context, Template  # noqa: E402
+
+from blog.const import COMMENTS_RELEASE_LIMIT  # noqa: E402
+from blog.fields import render_text  # noqa: E402
+from blog.models import Comment, Post  # noqa: E402
+
+REPEAT = 200
+LINE = 'Строка текста с <тегами> & "кавычками", которую нужно экранировать.'
+
+POST_FILTER = Template('{{ post.text|linebreaksbr }}')
+POST_STORED = Template('{{ post.text_html|safe }}')
+COMMENTS_FILTER = Template(
+    '{% for comment in comments %}{{ comment.text|linebreaksbr }}{% endfor %}'
+)
+COMMENTS_STORED = Template(
+    '{% for comment in comments %}{{ comment.text_html|safe }}{% endfor %}'
+)
+
+
+def make_text(lines):
+    return '\n'.join([LINE] * lines)
+
+
+def bench(template, context):
+    context = Context(context)
+    seconds = timeit.timeit(lambda: template.render(context), number=REPEAT)
+    return seconds / REPEAT * 1000
+
+
+def report(title, slow, fast):
+    print(
+        f'{title:<40} {slow:8.3f} мс -> {fast:8.3f} мс'
+        f' (x{slow / fast:.1f})'
+    )
+
+
+def main():
+    for lines in (10, 200, 2000):
+        text = make_text(lines)
+        post = Post(text=text, text_html=render_text(text))
+        context = {'post': post}
+        report(
+            f'Пост, строк: {lines}',
+            bench(POST_FILTER, context),
+            bench(POST_STORED, context),
+        )
+    for lines in (1, 20):
+        text = make_text(lines)
+        comments = [
+            Comment(text=text, text_html=render_text(text))
+            for _ in range(COMMENTS_RELEASE_LIMIT)
+        ]
+        context = {'comments': comments}
+        report(
+            f'Ветка {COMMENTS_RELEASE_LIMIT} комм., строк: {lines}',
+            bench(COMMENTS_FILTER, context),
+            bench(COMMENTS_STORED, context),
+        )
+
+
+if __name__ == '__main__':
+    main()
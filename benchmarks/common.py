@@ -0,0 +1,71 @@
+"""Общая подготовка окружения для бенчмарков."""
+import os
+import sys
+import timeit
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+BLOGICUM_DIR = Path(__file__).resolve().parent.parent / 'blogicum'
+
+
+def setup_django():
+    sys.path.insert(0, str(BLOGICUM_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Временная БД с применёнными миграциями, как в тестах."""
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def populate(posts, comments_per_post=0, text_lines=5):
+    """Автор, категория, местоположение и `posts` опубликованных постов."""
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from blog.models import Category, Comment, Location, Post
+
+    author = get_user_model().objects.create(username='bench')
+    category = Category.objects.create(
+        title='Категория', description='Описание', slug='bench'
+    )
+    location = Location.objects.create(name='Место')
+    now = timezone.now()
+    text = '\n'.join(['Строка текста публикации.'] * text_lines)
+    created = Post.objects.bulk_create(
+        Post(
+            title=f'Пост {i}',
+            text=text,
+            excerpt=Post.make_excerpt(text),
+            pub_date=now - timedelta(minutes=i),
+            author=author,
+            category=category,
+            location=location,
+            comment_count=comments_per_post,
+        )
+        for i in range(posts)
+    )
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=text)
+        for post in created
+        for _ in range(comments_per_post)
+    )
+    return created
+
+
+def per_call_ms(func, number):
+    return timeit.timeit(func, number=number) / number * 1000
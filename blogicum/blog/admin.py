@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.utils.translation import gettext_lazy as _
 
-from .models import Category, Comment, Location, Post
+from .models import Category, Comment, ImageJob, Location, Post
 
 admin.site.unregister(Group)
 
@@ -74,3 +74,10 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ("post", "author", "text", "created_at")
     search_fields = ("post__title", "author__username", "text")
     list_filter = ("created_at",)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ('image_name', 'post', 'status', 'attempts', 'run_after')
+    list_filter = ('status',)
+    readonly_fields = ('post', 'image_name', 'locked_at', 'error')
@@ -0,0 +1,182 @@
+import json
+
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views import View
+
+from .const import (API_CHUNK_SIZE, API_MAX_LIMIT, COMMENTS_RELEASE_LIMIT,
+                    POSTS_RELEASE_LIMIT)
+from .models import Post
+from .paginators import CursorPaginator, decode_cursor, encode_cursor
+from .registry import get_registry
+from .utils import check_post_visibility, get_posts_queryset
+
+
+def category_slug(category_id, registry):
+    category = registry.categories.get(category_id)
+    return category.slug if category is not None else None
+
+
+def location_name(location_id, registry):
+    location = registry.locations.get(location_id)
+    if location is None or not location.is_published:
+        return None
+    return location.name
+
+
+def image_url(name, registry):
+    storage = Post._meta.get_field('image').storage
+    return storage.url(name) if name else None
+
+
+class ApiListView(View):
+    """Потоковый JSON-список только для чтения.
+
+    Строки читаются через values_list() без создания моделей и отдаются
+    клиенту по мере чтения из БД. ?fields= выбирает поля из `fields`,
+    ?limit= - размер страницы, ?cursor= продолжает список с места,
+    которое вернул предыдущий ответ в `next`.
+    """
+
+    # Имя поля в ответе -> (столбец для values_list, преобразование).
+    fields = {}
+    default_fields = ()
+    cursor_field = 'pub_date'
+    descending = True
+    default_limit = POSTS_RELEASE_LIMIT
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_field_names(self):
+        names = self.request.GET.get('fields')
+        if not names:
+            return self.default_fields
+        names = tuple(dict.fromkeys(name.strip() for name in names.split(',')))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(f'Неизвестные поля: {", ".join(unknown)}.')
+        return names
+
+    def get_limit(self):
+        message = f'limit должен быть целым числом от 1 до {API_MAX_LIMIT}.'
+        try:
+            limit = int(self.request.GET.get('limit', self.default_limit))
+        except ValueError:
+            raise ValueError(message)
+        if not 0 < limit <= API_MAX_LIMIT:
+            raise ValueError(message)
+        return limit
+
+    def get(self, request, *args, **kwargs):
+        cursor = request.GET.get('cursor')
+        try:
+            names = self.get_field_names()
+            limit = self.get_limit()
+            if cursor:
+                decode_cursor(cursor)
+        except (ValueError, InvalidPage) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        self.registry = get_registry()
+        try:
+            queryset = self.get_queryset()
+        except Http404 as e:
+            return JsonResponse({'error': str(e)}, status=404)
+        columns = [self.fields[name][0] for name in names]
+        paginator = CursorPaginator(
+            queryset.values_list(
+                *columns, self.cursor_field, 'pk'
+            ),
+            limit,
+            field=self.cursor_field,
+            descending=self.descending,
+        )
+        rows = paginator.forward(cursor).iterator(chunk_size=API_CHUNK_SIZE)
+        return StreamingHttpResponse(
+            self.stream(names, rows, limit),
+            content_type='application/json',
+        )
+
+    def stream(self, names, rows, limit):
+        converters = [
+            (index, name, self.fields[name][1])
+            for index, name in enumerate(names)
+        ]
+        encode = DjangoJSONEncoder().encode
+        registry = self.registry
+        last = next_cursor = None
+        yield '{"results": ['
+        for count, row in enumerate(rows):
+            if count == limit:
+                next_cursor = encode_cursor(last[-2], last[-1])
+                break
+            item = {
+                name: row[index] if convert is None
+                else convert(row[index], registry)
+                for index, name, convert in converters
+            }
+            yield (',' if count else '') + encode(item)
+            last = row
+        yield f'], "next": {json.dumps(next_cursor)}}}'
+
+
+class PostListApiView(ApiListView):
+    """Лента опубликованных постов."""
+
+    fields = {
+        'id': ('id', None),
+        'title': ('title', None),
+        'excerpt': ('excerpt', None),
+        'text': ('text', None),
+        'text_html': ('text_html', None),
+        'pub_date': ('pub_date', None),
+        'author': ('author__username', None),
+        'category': ('category_id', category_slug),
+        'location': ('location_id', location_name),
+        'image': ('image', image_url),
+        'comment_count': ('comment_count', None),
+    }
+    default_fields = (
+        'id', 'title', 'excerpt', 'pub_date', 'author', 'category',
+        'location', 'image', 'comment_count',
+    )
+
+    def get_queryset(self):
+        return get_posts_queryset()
+
+
+class CategoryPostListApiView(PostListApiView):
+    """Посты опубликованной категории."""
+
+    def get_queryset(self):
+        category = self.registry.get_category(self.kwargs['category_slug'])
+        if category is None or not category.is_published:
+            raise Http404('Категория не найдена.')
+        return get_posts_queryset(base_queryset=category.posts.all())
+
+
+class CommentListApiView(ApiListView):
+    """Комментарии к видимому посту, от старых к новым."""
+
+    fields = {
+        'id': ('id', None),
+        'text': ('text', None),
+        'text_html': ('text_html', None),
+        'author': ('author__username', None),
+        'created_at': ('created_at', None),
+    }
+    default_fields = ('id', 'text', 'author', 'created_at')
+    cursor_field = 'created_at'
+    descending = False
+    default_limit = COMMENTS_RELEASE_LIMIT
+
+    def get_queryset(self):
+        post = Post.objects.with_taxonomy().only(
+            'author_id', 'is_published', 'pub_date', 'category_id'
+        ).filter(pk=self.kwargs['post_id']).first()
+        if post is None:
+            raise Http404('Публикация не найдена.')
+        check_post_visibility(post, self.request.user)
+        return post.comments.all()
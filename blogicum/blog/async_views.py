@@ -0,0 +1,35 @@
+from django.shortcuts import aget_object_or_404
+
+from .mixins import AsyncFeedMixin, AsyncReadMixin
+from .utils import aget_comments_page, check_post_visibility
+from .views import (CategoryListView, IndexListView, PostDetailView,
+                    UserListView)
+
+
+class AsyncIndexListView(AsyncFeedMixin, IndexListView):
+    """Главная страница сайта, асинхронный вариант."""
+
+
+class AsyncCategoryListView(AsyncFeedMixin, CategoryListView):
+    """Категория постов, асинхронный вариант."""
+
+
+class AsyncUserListView(AsyncFeedMixin, UserListView):
+    """Профиль пользователя, асинхронный вариант."""
+
+
+class AsyncPostDetailView(AsyncReadMixin, PostDetailView):
+    """Отдельный пост, асинхронный вариант."""
+
+    _comments = None
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await aget_object_or_404(
+            self.get_queryset(), pk=self.kwargs[self.pk_url_kwarg]
+        )
+        check_post_visibility(self.object, request.user)
+        self._comments = await aget_comments_page(self.object, request)
+        return self.render_to_response(self.get_context_data())
+
+    def get_comments(self):
+        return self._comments
@@ -0,0 +1,58 @@
+from uuid import uuid4
+
+from django.core.cache import caches
+
+from .const import VERSION_TIMEOUT
+
+VERSION_KEY = 'blog:version:{}'
+
+
+def get_shared_cache():
+    """Общий для всех процессов кэш версий и эпохи видимости.
+
+    Версии хранятся в нём, чтобы сигнал в одном процессе инвалидировал
+    данные в локальных кэшах всех остальных. Бэкенд берётся из `caches`
+    при каждом обращении и следует за настройкой CACHES.
+    """
+    return caches['shared']
+
+
+def _new_token():
+    return uuid4().hex
+
+
+def get_version(name):
+    """Текущая версия именованной группы кэшированных данных."""
+    return get_shared_cache().get_or_set(
+        VERSION_KEY.format(name), _new_token, VERSION_TIMEOUT
+    )
+
+
+def get_versions(*names, create=True):
+    """Версии нескольких групп кэша за одно обращение к кэшу.
+
+    С create=False недостающие версии не создаются, а вместо списка
+    возвращается None.
+    """
+    keys = [VERSION_KEY.format(name) for name in names]
+    shared_cache = get_shared_cache()
+    versions = shared_cache.get_many(keys)
+    missing = {key: _new_token() for key in keys if key not in versions}
+    if missing:
+        if not create:
+            return None
+        shared_cache.set_many(missing, VERSION_TIMEOUT)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*names):
+    """Инвалидирует группы кэша, выдавая им новые версии.
+
+    Версия - случайный токен, а не счётчик: после вытеснения ключа из кэша
+    или отката транзакции старое значение не может повториться.
+    """
+    get_shared_cache().set_many(
+        {VERSION_KEY.format(name): _new_token() for name in names},
+        VERSION_TIMEOUT,
+    )
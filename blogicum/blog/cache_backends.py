@@ -0,0 +1,30 @@
+import random
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class VersionFileCache(FileBasedCache):
+    """Файловый кэш версий без обхода каталога при каждой записи.
+
+    FileBasedCache перечисляет все файлы кэша перед каждой записью, и
+    запись версии дорожала с числом постов и пользователей. Здесь каталог
+    проверяется в среднем раз в `cull_interval` записей, а при
+    переполнении сначала удаляются истёкшие версии.
+    """
+
+    cull_interval = 1000
+
+    def _cull(self):
+        if random.randrange(self.cull_interval):
+            return
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        for fname in filelist:
+            try:
+                with open(fname, 'rb') as f:
+                    # Удаляет файл, если версия истекла.
+                    self._is_expired(f)
+            except FileNotFoundError:
+                pass
+        super()._cull()
@@ -3,6 +3,97 @@
 # Количество постов на главной странице
 POSTS_RELEASE_LIMIT = 10
 
+# Количество комментариев на странице поста и в подгружаемой порции
+COMMENTS_RELEASE_LIMIT = 50
+
+# Время жизни закэшированного количества постов в ленте, в секундах
+FEED_COUNT_CACHE_TIMEOUT = 60
+
+# Сколько ближайших отложенных публикаций держать в кэше эпохи видимости
+EPOCH_UPCOMING_LIMIT = 10
+
+# Время жизни состояния эпохи видимости в кэше, в секундах
+EPOCH_STATE_TIMEOUT = 60
+
+# Время жизни отрендеренной карточки поста в кэше, в секундах
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Время жизни версии группы кэша, в секундах. Истёкшая версия заменяется
+# новой - данные под старой просто перестают читаться.
+VERSION_TIMEOUT = 60 * 60 * 24 * 7
+
+# Максимальное время жизни страницы в кэше для анонимных читателей,
+# в секундах
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Количество ссылок на страницы по обе стороны от текущей
+# и на концах пагинатора
+PAGINATOR_ON_EACH_SIDE = 2
+PAGINATOR_ON_ENDS = 1
+
+# Количество слов в анонсе поста для карточки в ленте
+EXCERPT_WORDS = 10
+
+# Наибольший размер страницы JSON API (?limit=)
+API_MAX_LIMIT = 100
+
+# Сколько строк читать из БД за раз при потоковой выдаче JSON API
+API_CHUNK_SIZE = 100
+
+# Как часто процесс проверяет локальный брокер на события других
+# процессов, в секундах
+EVENTS_POLL_INTERVAL = 0.5
+
+# Сколько хранить событие в локальном брокере, в секундах
+EVENTS_RETENTION = 60 * 5
+
+# Интервал пустых сообщений, держащих SSE-соединение открытым, в секундах
+EVENTS_HEARTBEAT = 15
+
+# Через сколько миллисекунд браузер переподключается к SSE-потоку
+EVENTS_RETRY = 3000
+
+# Ширины уменьшенных копий изображения поста, в пикселях
+IMAGE_VARIANT_WIDTHS = (320, 640, 960)
+
+# Качество JPEG и WebP уменьшенных копий
+IMAGE_VARIANT_QUALITY = 82
+
+# Атрибут sizes для изображений в карточке и на странице поста
+# (карточка шириной 40rem)
+IMAGE_SIZES = '(max-width: 40rem) 100vw, 40rem'
+
+# Размер размытой заглушки изображения по большей стороне, в пикселях
+IMAGE_PLACEHOLDER_SIZE = 16
+
+# Качество JPEG размытой заглушки
+IMAGE_PLACEHOLDER_QUALITY = 40
+
+# Пауза воркера изображений между проверками пустой очереди, в секундах
+IMAGE_JOBS_POLL_INTERVAL = 1
+
+# Сколько раз воркер пытается обработать изображение
+IMAGE_JOB_MAX_ATTEMPTS = 5
+
+# Задержка перед первым повтором, в секундах; дальше она удваивается
+IMAGE_JOB_RETRY_DELAY = 30
+
+# Через сколько секунд задачу упавшего воркера забирает другой
+IMAGE_JOB_LOCK_TIMEOUT = 60 * 10
+
+# Сколько секунд не трогать файл без ссылок: пост с ним может
+# ещё сохраняться
+IMAGE_GC_GRACE_PERIOD = 60 * 60
+
+# Наибольший размер загружаемого изображения, в байтах
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+
+# Наибольшее количество пикселей загружаемого изображения
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000
+
+# Сколько байт начала файла читать в поисках заголовка изображения
+IMAGE_HEADER_MAX_BYTES = 256 * 1024
+
 # Максимальное количество символово в полях title и name
 MAX_LENGTH_TITLE_FIELDS = 256
 
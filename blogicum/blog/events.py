@@ -0,0 +1,212 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from .const import EVENTS_POLL_INTERVAL, EVENTS_RETENTION
+
+_hub = None
+
+
+def post_channel(post_id):
+    return f'post-{post_id}'
+
+
+class LocalBroker:
+    """Брокер-заглушка на файлах: события видны всем процессам хоста.
+
+    Каждое событие - отдельный файл в каталоге канала. Имя начинается
+    со времени публикации, поэтому порядок имён - порядок событий.
+    Старые события и опустевшие каналы удаляет expire().
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._next_expire = 0
+
+    def marker(self):
+        """Метка "сейчас": read() после неё вернёт только новые события."""
+        return f'{time.time_ns():020d}'
+
+    def publish(self, channel, message):
+        directory = self.root / channel
+        name = f'{self.marker()}-{uuid.uuid4().hex}.json'
+        temp = directory / f'.{name}'
+        text = json.dumps(message)
+        try:
+            temp.write_text(text, encoding='utf-8')
+        except FileNotFoundError:
+            # Канала ещё нет или expire() только что удалил пустой.
+            directory.mkdir(parents=True, exist_ok=True)
+            temp.write_text(text, encoding='utf-8')
+        os.replace(temp, directory / name)
+        self.expire()
+
+    def read(self, channel, after):
+        """Пары (метка, сообщение) канала, опубликованные после `after`."""
+        directory = self.root / channel
+        try:
+            names = sorted(
+                name for name in os.listdir(directory)
+                if not name.startswith('.') and name > after
+            )
+        except FileNotFoundError:
+            return []
+        messages = []
+        for name in names:
+            try:
+                text = (directory / name).read_text(encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            messages.append((name, json.loads(text)))
+        return messages
+
+    def expire(self):
+        """Удаляет события старше EVENTS_RETENTION и пустые каналы.
+
+        Каталог обходится не чаще раза в EVENTS_RETENTION на процесс.
+        """
+        now = time.monotonic()
+        if now < self._next_expire:
+            return
+        self._next_expire = now + EVENTS_RETENTION
+        deadline = f'{time.time_ns() - EVENTS_RETENTION * 10 ** 9:020d}'
+        try:
+            channels = list(self.root.iterdir())
+        except FileNotFoundError:
+            return
+        for directory in channels:
+            self._expire_channel(directory, deadline)
+
+    def _expire_channel(self, directory, deadline):
+        try:
+            names = os.listdir(directory)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        for name in names:
+            if not name.startswith('.') and name < deadline:
+                (directory / name).unlink(missing_ok=True)
+        try:
+            # Удаляется, только если в канале не осталось файлов.
+            directory.rmdir()
+        except OSError:
+            pass
+
+
+class Subscription:
+    """Очередь событий одного SSE-соединения."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def put(self, event):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    async def get(self, timeout=None):
+        """Следующее событие или None, если за `timeout` их не было."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+
+class EventHub:
+    """Pub/sub процесса поверх локального брокера.
+
+    Событие, опубликованное в этом процессе, сразу раздаётся местным
+    подписчикам и пишется в брокер. События других процессов забирает
+    из брокера фоновая задача канала - пока у канала есть подписчики.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.origin = uuid.uuid4().hex
+        self._subscribers = {}
+        self._pollers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        self.broker.publish(channel, {'origin': self.origin, 'event': event})
+        self._deliver(channel, event)
+
+    def _deliver(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    async def _poll(self, channel):
+        after = self.broker.marker()
+        while True:
+            await asyncio.sleep(EVENTS_POLL_INTERVAL)
+            # Чтение каталога брокера - блокирующий ввод-вывод.
+            messages = await asyncio.to_thread(
+                self.broker.read, channel, after
+            )
+            for after, message in messages:
+                if message['origin'] != self.origin:
+                    self._deliver(channel, message['event'])
+            # Каналы, в которые больше не пишут, чистятся и отсюда.
+            await asyncio.to_thread(self.broker.expire)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscription = Subscription()
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+            if channel not in self._pollers:
+                self._pollers[channel] = asyncio.create_task(
+                    self._poll(channel)
+                )
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._subscribers[channel]
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+                    self._pollers.pop(channel).cancel()
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        _hub = EventHub(LocalBroker(settings.BLOG_EVENTS_DIR))
+    return _hub
+
+
+def comment_event(comment):
+    """Событие нового комментария: id и HTML для ветки без кнопок автора."""
+    return {
+        'id': comment.pk,
+        'html': render_to_string(
+            'includes/comments.html',
+            {'post': comment.post, 'comments': [comment], 'fragment': True},
+        ),
+    }
+
+
+def publish_comment(comment):
+    """Отправляет комментарий подписчикам поста после коммита транзакции."""
+    transaction.on_commit(
+        lambda: get_hub().publish(
+            post_channel(comment.post_id), comment_event(comment)
+        )
+    )
+
+
+def format_sse(event):
+    return (
+        f'id: {event["id"]}\nevent: comment\n'
+        f'data: {json.dumps(event)}\n\n'
+    )
@@ -0,0 +1,46 @@
+from django.db import models
+from django.template.defaultfilters import linebreaksbr
+
+
+def render_text(text):
+    """Экранированный HTML текста с переносами строк, как linebreaksbr."""
+    return str(linebreaksbr(text, autoescape=True))
+
+
+class RenderedTextField(models.TextField):
+    """Готовый HTML текстового поля `source`, пересчитываемый при записи.
+
+    Шаблоны выводят его через `|safe` вместо `linebreaksbr` на каждый
+    показ страницы.
+    """
+
+    def __init__(self, *args, source='text', **kwargs):
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        self.source = source
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.source != 'text':
+            kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = render_text(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class ImagePreviewField(models.JSONField):
+    """Размеры изображения и его заглушка для карточки.
+
+    Размеры записываются при загрузке по заголовку файла, цвет
+    и размытая заглушка - воркером изображений вместе с копиями.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', dict)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
@@ -1,17 +1,62 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from PIL import Image
 
 from .const import MAX_NAME_LENGTH
 from .models import Comment, Post
+from .uploads import open_image_header
+
+
+class HeaderImageField(forms.ImageField):
+    """Поле изображения, проверяющее только заголовок файла.
+
+    В отличие от forms.ImageField не копирует загрузку в память
+    и не вызывает verify(): формат и размеры известны из заголовка,
+    а пиксели декодирует только воркер копий.
+    """
+
+    def to_python(self, data):
+        f = forms.FileField.to_python(self, data)
+        if f is None:
+            return None
+        try:
+            # Заголовок читается из самой загрузки - из памяти или из
+            # временного файла, без копии и без отдельного дескриптора.
+            image = open_image_header(data)
+        except Image.DecompressionBombError as e:
+            raise ValidationError(str(e), code='too_many_pixels') from e
+        except Exception as exc:
+            raise ValidationError(
+                self.error_messages['invalid_image'],
+                code='invalid_image',
+            ) from exc
+        f.image = image
+        f.content_type = Image.MIME.get(image.format)
+        if hasattr(f, 'seek') and callable(f.seek):
+            f.seek(0)
+        return f
 
 
 class PostCreateForm(forms.ModelForm):
     """Создание публикаций."""
 
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Файл, остановленный обработчиком загрузки, в форму не попал.
+        for field, error in self.upload_errors.items():
+            self.add_error(field, error)
+        return cleaned_data
+
     class Meta:
         model = Post
         exclude = ['author']
+        field_classes = {'image': HeaderImageField}
         widgets = {
             'pub_date': forms.DateTimeInput(
                 format='%Y-%m-%dT%H:%M:%S',
@@ -0,0 +1,141 @@
+import base64
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import ExifTags, Image, ImageOps
+
+from .const import (IMAGE_PLACEHOLDER_QUALITY, IMAGE_PLACEHOLDER_SIZE,
+                    IMAGE_VARIANT_QUALITY, IMAGE_VARIANT_WIDTHS)
+
+VARIANTS_DIR = 'variants'
+WEBP = 'webp'
+JPEG_SUFFIXES = ('.jpg', '.jpeg')
+# Ориентации EXIF, при которых изображение поворачивается на 90 градусов.
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def variant_extension(name):
+    """JPEG-исходники уменьшаются в JPEG, остальные - в PNG."""
+    suffix = PurePosixPath(name).suffix.lower()
+    return 'jpg' if suffix in JPEG_SUFFIXES else 'png'
+
+
+def variant_name(name, width, extension=None):
+    """Имя копии: posts/a.jpg -> posts/variants/a-640w.jpg (или .webp)."""
+    path = PurePosixPath(name)
+    extension = extension or variant_extension(name)
+    return str(
+        path.parent / VARIANTS_DIR / f'{path.stem}-{width}w.{extension}'
+    )
+
+
+def variant_names(name):
+    """Имена всех копий, которые могли быть созданы для изображения."""
+    return [
+        variant_name(name, width, extension)
+        for width in IMAGE_VARIANT_WIDTHS
+        for extension in (None, WEBP)
+    ]
+
+
+def _save(storage, name, image, image_format):
+    buffer = BytesIO()
+    image.save(
+        buffer, image_format, quality=IMAGE_VARIANT_QUALITY, optimize=True
+    )
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def read_size(storage, name):
+    """Размеры изображения с учётом поворота EXIF, только по заголовку."""
+    with storage.open(name) as source:
+        image = Image.open(source)
+        width, height = image.size
+        orientation = image.getexif().get(ExifTags.Base.Orientation)
+    if orientation in ROTATED_ORIENTATIONS:
+        width, height = height, width
+    return {'width': width, 'height': height}
+
+
+def open_image(storage, name):
+    """Декодированное изображение, повёрнутое согласно EXIF."""
+    with storage.open(name) as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    return image
+
+
+def make_preview(image):
+    """Размеры, средний цвет и размытая заглушка в виде data-URI.
+
+    Заглушка - копия шириной в несколько пикселей: браузер растягивает
+    её на место изображения, и она выглядит размытой.
+    """
+    tiny = image.convert('RGB')
+    tiny.thumbnail((IMAGE_PLACEHOLDER_SIZE, IMAGE_PLACEHOLDER_SIZE))
+    red, green, blue = tiny.resize((1, 1), Image.Resampling.BOX).getpixel(
+        (0, 0)
+    )
+    buffer = BytesIO()
+    tiny.save(buffer, 'JPEG', quality=IMAGE_PLACEHOLDER_QUALITY)
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return {
+        'width': image.width,
+        'height': image.height,
+        'color': f'#{red:02x}{green:02x}{blue:02x}',
+        'placeholder': f'data:image/jpeg;base64,{encoded}',
+    }
+
+
+def process_image(storage, name):
+    """Копии и заглушка изображения за одно декодирование.
+
+    Работа CPU-ёмкая - вызывается из процессов воркера, а не из запроса.
+    """
+    image = open_image(storage, name)
+    return generate_variants(storage, name, image), make_preview(image)
+
+
+def generate_variants(storage, name, image=None):
+    """Уменьшенные копии изображения в формате исходника и в WebP.
+
+    Создаются только копии уже исходника; возвращает их ширины.
+    """
+    if image is None:
+        image = open_image(storage, name)
+    extension = variant_extension(name)
+    if extension == 'jpg':
+        image_format = 'JPEG'
+        image = image.convert('RGB')
+    else:
+        image_format = 'PNG'
+        image = image.convert('RGBA')
+
+    widths = []
+    for width in IMAGE_VARIANT_WIDTHS:
+        if width >= image.width:
+            break
+        height = max(round(image.height * width / image.width), 1)
+        variant = image.resize((width, height), Image.Resampling.LANCZOS)
+        _save(
+            storage, variant_name(name, width),
+            variant, image_format,
+        )
+        _save(
+            storage, variant_name(name, width, WEBP),
+            variant, 'WEBP',
+        )
+        widths.append(width)
+    return widths
+
+
+def get_srcset(field_file, widths, extension=None):
+    """Значение srcset из уже созданных копий."""
+    url = field_file.storage.url
+    return ', '.join(
+        f'{url(variant_name(field_file.name, width, extension))} {width}w'
+        for width in widths
+    )
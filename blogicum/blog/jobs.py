@@ -0,0 +1,124 @@
+"""Очередь фоновой обработки изображений постов.
+
+Задачи лежат в таблице ImageJob, отдельный брокер не нужен. Воркер
+(команда process_image_jobs) забирает созревшие задачи, отдаёт нарезку
+копий и заглушки пулу процессов и записывает результат в пост. Ошибки
+повторяются с растущей задержкой, после IMAGE_JOB_MAX_ATTEMPTS попыток
+задача остаётся в состоянии failed.
+"""
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+import django
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .cache import bump_version
+from .const import (IMAGE_JOB_LOCK_TIMEOUT, IMAGE_JOB_MAX_ATTEMPTS,
+                    IMAGE_JOB_RETRY_DELAY)
+from .images import process_image
+from .models import ImageJob, Post
+
+
+def setup_worker():
+    """Инициализатор процесса пула при запуске методом spawn."""
+    django.setup()
+
+
+def prepare_image(name):
+    """Задача процесса пула: копии и заглушка, без обращений к БД."""
+    return process_image(Post._meta.get_field('image').storage, name)
+
+
+def due_jobs(now):
+    stale = now - timedelta(seconds=IMAGE_JOB_LOCK_TIMEOUT)
+    return ImageJob.objects.filter(
+        Q(status=ImageJob.Status.PENDING, run_after__lte=now)
+        | Q(status=ImageJob.Status.RUNNING, locked_at__lt=stale)
+    )
+
+
+def claim_jobs(limit):
+    """Помечает до `limit` созревших задач взятыми и возвращает их.
+
+    Условный UPDATE не даст двум воркерам взять одну задачу: второй
+    не найдёт её среди созревших, а locked_at отличит свои задачи.
+    """
+    now = timezone.now()
+    ids = list(due_jobs(now).values_list('pk', flat=True)[:limit])
+    due_jobs(now).filter(pk__in=ids).update(
+        status=ImageJob.Status.RUNNING,
+        locked_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return list(
+        ImageJob.objects.filter(
+            pk__in=ids, status=ImageJob.Status.RUNNING, locked_at=now
+        )
+    )
+
+
+def complete_job(job, result):
+    """Записывает копии и заглушку, если изображение поста не сменилось."""
+    widths, preview = result
+    updated = Post.objects.filter(
+        pk=job.post_id, image=job.image_name
+    ).update(image_widths=widths, image_preview=preview)
+    if updated:
+        bump_version(f'post:{job.post_id}', 'pages')
+    job.delete()
+
+
+def fail_job(job, error):
+    """Откладывает задачу с удвоением задержки или помечает её failed."""
+    job.error = str(error) or type(error).__name__
+    job.locked_at = None
+    if job.attempts >= IMAGE_JOB_MAX_ATTEMPTS:
+        job.status = ImageJob.Status.FAILED
+    else:
+        job.status = ImageJob.Status.PENDING
+        job.run_after = timezone.now() + timedelta(
+            seconds=IMAGE_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        )
+    # Пока задача выполнялась, пост могли удалить вместе с ней - тогда
+    # UPDATE просто не затронет строк.
+    ImageJob.objects.filter(pk=job.pk).update(
+        error=job.error,
+        locked_at=job.locked_at,
+        status=job.status,
+        run_after=job.run_after,
+    )
+
+
+def run_jobs(executor, limit):
+    """Обрабатывает одну порцию задач; возвращает их количество.
+
+    Если пул сломан (процесс убит, например, при нехватке памяти),
+    задачи порции откладываются, а BrokenProcessPool пробрасывается,
+    чтобы воркер создал новый пул.
+    """
+    jobs = claim_jobs(limit)
+    futures = {}
+    broken = None
+    for job in jobs:
+        try:
+            futures[executor.submit(prepare_image, job.image_name)] = job
+        except BrokenProcessPool as e:
+            broken = e
+            fail_job(job, e)
+    for future in as_completed(futures):
+        job = futures[future]
+        try:
+            result = future.result()
+        # Любая ошибка процесса пула - повод повторить задачу позже,
+        # а не остановить воркер.
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                broken = e
+            fail_job(job, e)
+        else:
+            complete_job(job, result)
+    if broken is not None:
+        raise broken
+    return len(jobs)
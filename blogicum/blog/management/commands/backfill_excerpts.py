@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.cache import bump_version
+from blog.models import Post
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Заполняет анонсы постов, сохранённых до появления поля excerpt.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество постов, обрабатываемых за один запрос.',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать анонсы всех постов, а не только пустые.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Post.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(excerpt='')
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', 'text')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for post in batch:
+                post.excerpt = Post.make_excerpt(post.text)
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, ['excerpt'])
+            # bulk_update не отправляет сигналов - карточки с пустым
+            # анонсом сбрасываются явно.
+            bump_version(*(f'post:{post.pk}' for post in batch), 'pages')
+            updated += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено анонсов: {updated}')
+        )
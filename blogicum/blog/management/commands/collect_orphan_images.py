@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.const import IMAGE_GC_GRACE_PERIOD
+from blog.images import variant_names
+from blog.models import Post
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет изображения постов и их копии, на которые не ссылается '
+        'ни один пост.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество файлов, проверяемых за один запрос.',
+        )
+        parser.add_argument(
+            '--grace-period',
+            type=int,
+            default=IMAGE_GC_GRACE_PERIOD,
+            help='Не удалять файлы моложе этого числа секунд.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести файлы, которые будут удалены.',
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        directory = field.upload_to.rstrip('/')
+        try:
+            _, files = storage.listdir(directory)
+        except FileNotFoundError:
+            files = []
+        names = sorted(f'{directory}/{file}' for file in files)
+        deadline = timezone.now() - timedelta(
+            seconds=options['grace_period']
+        )
+        batch_size = options['batch_size']
+        removed = 0
+        for start in range(0, len(names), batch_size):
+            refcounts = Post.objects.image_refcounts(
+                names[start:start + batch_size]
+            )
+            for name, refs in refcounts.items():
+                if refs or storage.get_modified_time(name) > deadline:
+                    continue
+                removed += 1
+                if options['dry_run']:
+                    self.stdout.write(name)
+                    continue
+                for stored in (name, *variant_names(name)):
+                    storage.delete(stored)
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено изображений: {removed}')
+        )
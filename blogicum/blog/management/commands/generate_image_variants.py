@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import bump_version
+from blog.images import process_image
+from blog.models import Post
+
+DEFAULT_BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные копии, WebP и заглушки для изображений '
+        'постов, загруженных до их появления.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество постов, обрабатываемых за один запрос.',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии для всех изображений, а не только новых.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            queryset = queryset.without_processed_image()
+        last_pk = 0
+        processed = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', 'image')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for post in batch:
+                try:
+                    widths, preview = process_image(
+                        post.image.storage, post.image.name
+                    )
+                except (OSError, ValueError) as e:
+                    self.stderr.write(f'Пост {post.pk}: {e}')
+                    continue
+                Post.objects.filter(pk=post.pk).update(
+                    image_widths=widths, image_preview=preview
+                )
+                processed += 1
+            bump_version(*(f'post:{post.pk}' for post in batch), 'pages')
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано изображений: {processed}')
+        )
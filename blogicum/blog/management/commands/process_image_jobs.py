@@ -0,0 +1,65 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+
+from blog.const import IMAGE_JOBS_POLL_INTERVAL
+from blog.jobs import run_jobs, setup_worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Воркер очереди изображений: нарезает уменьшенные копии '
+        'в пуле процессов и повторяет неудачные задачи.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов пула.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать созревшие задачи и завершиться.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=IMAGE_JOBS_POLL_INTERVAL,
+            help='Пауза между проверками пустой очереди, в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        processed = 0
+        pool = self.make_pool(workers)
+        try:
+            while True:
+                try:
+                    # Порция по две задачи на процесс: пока одни копии
+                    # записываются, пул уже занят следующими.
+                    count = run_jobs(pool, workers * 2)
+                except BrokenProcessPool as e:
+                    self.stderr.write(f'Пул процессов пересоздан: {e}')
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self.make_pool(workers)
+                    continue
+                processed += count
+                if count:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        finally:
+            pool.shutdown()
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано задач: {processed}')
+        )
+
+    def make_pool(self, workers):
+        return ProcessPoolExecutor(workers, initializer=setup_worker)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from blog.cache import bump_version
+from blog.models import Post
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает разошедшиеся счётчики комментариев постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество постов, проверяемых за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        fixed = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            drifted = list(
+                Post.objects.filter(pk__in=batch)
+                .annotate(actual_count=Count('comments'))
+                .exclude(comment_count=F('actual_count'))
+                .only('pk', 'comment_count')
+            )
+            for post in drifted:
+                post.comment_count = post.actual_count
+            if not drifted:
+                continue
+            with transaction.atomic():
+                Post.objects.bulk_update(drifted, ['comment_count'])
+            # bulk_update не отправляет сигналов - карточки и страницы
+            # со старым счётчиком сбрасываются явно.
+            bump_version(*(f'post:{post.pk}' for post in drifted), 'pages')
+            fixed += len(drifted)
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {fixed}')
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_widths',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Ширины уменьшенных копий изображения'),
+        ),
+    ]
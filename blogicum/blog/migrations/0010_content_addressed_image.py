@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:13
+
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_imagejob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, storage=blog.storage.get_image_storage, upload_to='posts/', verbose_name='Изображение'),
+        ),
+    ]
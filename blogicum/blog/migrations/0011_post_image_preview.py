@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:18
+
+import blog.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_content_addressed_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_preview',
+            field=blog.fields.ImagePreviewField(blank=True, default=dict, editable=False, verbose_name='Размеры и заглушка изображения'),
+        ),
+    ]
@@ -1,17 +1,71 @@
+import hashlib
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.cache import caches
+from django.core.paginator import InvalidPage
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag, urlencode
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from .cache import get_version, get_versions
+from .models import Post
+from .paginators import CursorPaginator, FeedPaginator
+from .uploads import ImageLimitsUploadHandler
+from .utils import get_page_cache_timeout
+from .visibility import get_visibility_epoch
 
 User = get_user_model()
 
 
-class AuthorTestMixin(UserPassesTestMixin):
+class ObjectCacheMixin:
+    """Запоминает объект запроса: get_object() обращается к БД один раз."""
+
+    _object = None
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if self._object is None:
+            self._object = super().get_object()
+        return self._object
+
+
+class AuthorTestMixin(ObjectCacheMixin, UserPassesTestMixin):
     """Добавляет test_func - является ли пользователь автором поста."""
 
     def test_func(self):
         object = self.get_object()
-        return object.author == self.request.user
+        return object.author_id == self.request.user.pk
+
+
+class ImageUploadMixin:
+    """Проверка изображений формы поста на лету.
+
+    Обработчик лимитов ставится первым до разбора тела запроса, поэтому
+    CSRF проверяется не промежуточным слоем, а в dispatch - уже после
+    установки обработчика. Ошибки обработчика передаются форме.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def dispatch(self, request, *args, **kwargs):
+        request.upload_handlers.insert(0, ImageLimitsUploadHandler(request))
+        return csrf_protect(super().dispatch)(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['upload_errors'] = getattr(self.request, 'upload_errors', {})
+        return kwargs
 
 
 class ReverseMixin:
@@ -24,10 +78,339 @@ class ReverseMixin:
         )
 
 
+class CommentFragmentMixin:
+    """JSON-режим записи комментария: без перехода на страницу поста.
+
+    Клиент, предпочитающий application/json, получает HTML затронутого
+    комментария (пустой после удаления) и новое число комментариев поста;
+    остальные - обычный редирект.
+    """
+
+    fragment_template_name = 'includes/comments.html'
+
+    def wants_fragment(self):
+        return self.request.get_preferred_type(
+            ('text/html', 'application/json')
+        ) == 'application/json'
+
+    def render_fragment(self, comment, comment_id):
+        post = get_object_or_404(
+            Post.objects.only('comment_count'), pk=self.kwargs['post_id']
+        )
+        html = ''
+        if comment.pk is not None:
+            html = render_to_string(
+                self.fragment_template_name,
+                {'post': post, 'comments': [comment], 'fragment': True},
+                request=self.request,
+            )
+        return JsonResponse({
+            'id': comment_id,
+            'html': html,
+            'comment_count': post.comment_count,
+        })
+
+    def form_valid(self, form):
+        # После delete() у объекта уже нет pk - запоминаем его заранее.
+        comment_id = getattr(self.object, 'pk', None)
+        response = super().form_valid(form)
+        if self.wants_fragment():
+            return self.render_fragment(
+                self.object, comment_id or self.object.pk
+            )
+        return response
+
+    def form_invalid(self, form):
+        if self.wants_fragment():
+            return JsonResponse(
+                {'errors': form.errors}, status=HTTPStatus.BAD_REQUEST
+            )
+        return super().form_invalid(form)
+
+
 class BaseUserMixin:
     """Миксин для работы с пользователями"""
 
+    _user_object = None
+
     def get_user_object(self):
-        """Получение объекта пользователя"""
-        username = self.kwargs.get('username')
-        return get_object_or_404(User, username=username)
+        """Получение объекта пользователя (один запрос на весь запрос)"""
+        if self._user_object is None:
+            username = self.kwargs.get('username')
+            self._user_object = get_object_or_404(User, username=username)
+        return self._user_object
+
+
+class FeedPaginationMixin:
+    """Пагинация ленты постов.
+
+    По номеру страницы - с кэшированным количеством постов;
+    по курсору ?before=/?after= - если включён cursor_pagination
+    или курсор передан в запросе. С ?fragment=1 отдаются только карточки
+    очередной курсорной страницы, без base.html.
+    """
+
+    paginator_class = FeedPaginator
+    cursor_pagination = False
+    cursor_params = ('before', 'after')
+    fragment_param = 'fragment'
+    fragment_template_name = 'blog/cards.html'
+
+    def is_fragment(self):
+        """Запрошены только карточки - для бесконечной прокрутки."""
+        return self.fragment_param in self.request.GET
+
+    def get_template_names(self):
+        if self.is_fragment():
+            return [self.fragment_template_name]
+        return super().get_template_names()
+
+    def get_feed_key(self):
+        """Ключ ленты для кэширования количества постов."""
+        return self.request.path
+
+    def get_paginator(self, *args, **kwargs):
+        return super().get_paginator(
+            *args, cache_key=self.get_feed_key(), **kwargs
+        )
+
+    def get_cursors(self):
+        """Курсоры запроса или None, если лента листается по номерам."""
+        cursors = {
+            key: self.request.GET.get(key) for key in self.cursor_params
+        }
+        if (self.cursor_pagination or self.is_fragment()
+                or any(cursors.values())):
+            return cursors
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        cursors = self.get_cursors()
+        if cursors is None:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(**cursors)
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    async def apaginate_queryset(self, queryset, page_size):
+        """paginate_queryset(), читающий страницу асинхронным ORM."""
+        cursors = self.get_cursors()
+        try:
+            if cursors is not None:
+                paginator = CursorPaginator(queryset, page_size)
+                page = await paginator.apage(**cursors)
+            else:
+                paginator = self.get_paginator(
+                    queryset,
+                    page_size,
+                    orphans=self.get_paginate_orphans(),
+                    allow_empty_first_page=self.get_allow_empty(),
+                )
+                number = (self.kwargs.get(self.page_kwarg)
+                          or self.request.GET.get(self.page_kwarg) or 1)
+                if number == 'last':
+                    await paginator.acount()
+                    number = paginator.num_pages
+                page = await paginator.apage(number)
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class AnonymousPageCacheMixin:
+    """Кэширует страницу целиком для анонимных читателей.
+
+    Ключ содержит версию `pages`, которую сбрасывают сигналы при изменении
+    постов, категорий, местоположений, комментариев и пользователей.
+    Страница живёт в кэше не дольше, чем до ближайшей отложенной публикации.
+    Запросы с параметрами, которых лента не читает, не кэшируются.
+    """
+
+    page_cache_params = ('page', 'before', 'after', 'fragment')
+
+    def get_page_cache_key(self):
+        """Ключ страницы в кэше или None, если её не нужно кэшировать."""
+        params = self.request.GET
+        if not set(params) <= set(self.page_cache_params):
+            return None
+        query = urlencode([
+            (name, params[name])
+            for name in self.page_cache_params if name in params
+        ])
+        path = hashlib.md5(
+            f'{self.request.path}?{query}'.encode()
+        ).hexdigest()
+        return (
+            f'blog:page:{get_version("pages")}:'
+            f'{get_visibility_epoch().token}:{path}'
+        )
+
+    def get_cached_page(self, request):
+        """(ключ, страница из кэша или None); ключ None - не кэшировать."""
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return None, None
+        key = self.get_page_cache_key()
+        if key is None:
+            return None, None
+        return key, caches['pages'].get(key)
+
+    def cache_page(self, key, response):
+        """Кладёт успешный ответ в кэш, как только он отрендерится."""
+        if key is None or response.status_code != HTTPStatus.OK:
+            return
+        timeout = get_page_cache_timeout()
+        response.add_post_render_callback(
+            lambda rendered: caches['pages'].set(key, rendered, timeout)
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        key, response = self.get_cached_page(request)
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        self.cache_page(key, response)
+        return response
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 Not Modified, если страница не изменилась.
+
+    ETag собирается из версий кэша, от которых зависит страница,
+    пользователя и CSRF-cookie (в форме комментария её токен), без
+    рендера шаблона.
+    """
+
+    etag_versions = ('pages',)
+    # Версии страницы объекта создаются только после ответа 200: иначе
+    # каждый адрес несуществующего объекта оставлял бы новую версию.
+    create_etag_versions = True
+
+    def get_etag_versions(self):
+        return self.etag_versions
+
+    def get_etag_parts(self):
+        return (
+            self.request.user.pk,
+            self.request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        )
+
+    def get_etag(self):
+        """Возвращает ETag страницы или None, если её версий ещё нет."""
+        versions = get_versions(
+            *self.get_etag_versions(), create=self.create_etag_versions
+        )
+        if versions is None:
+            return None
+        parts = ':'.join(
+            str(part) for part in (*versions, *self.get_etag_parts())
+        )
+        return quote_etag(hashlib.md5(parts.encode()).hexdigest())
+
+    def get_not_modified(self, request):
+        """(ETag или None, ответ 304 или None)."""
+        if request.method not in ('GET', 'HEAD'):
+            return None, None
+        etag = self.get_etag()
+        if etag is None:
+            return None, None
+        return etag, get_conditional_response(request, etag=etag)
+
+    def set_etag(self, response, etag):
+        """Ставит ETag успешному ответу на GET.
+
+        Если версий ещё не было, объект существует: они создаются,
+        и ETag получит уже следующий ответ.
+        """
+        if (self.request.method not in ('GET', 'HEAD')
+                or response.status_code != HTTPStatus.OK):
+            return
+        if etag is None:
+            get_versions(*self.get_etag_versions())
+        else:
+            response['ETag'] = etag
+
+    def dispatch(self, request, *args, **kwargs):
+        etag, response = self.get_not_modified(request)
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        self.set_etag(response, etag)
+        return response
+
+
+class FeedConditionalGetMixin(ConditionalGetMixin):
+    """ETag ленты учитывает и эпоху видимости.
+
+    Так отложенный пост, вышедший по расписанию, меняет ETag.
+    """
+
+    def get_etag_parts(self):
+        return (*super().get_etag_parts(), get_visibility_epoch().token)
+
+
+class AsyncReadMixin:
+    """Асинхронный путь чтения под ASGI: ставится перед представлением.
+
+    Заменяет синхронный dispatch, но вызывает те же шаги
+    ConditionalGetMixin и AnonymousPageCacheMixin: проверки до get()
+    и запись после него - по одному переходу в поток. Обработчик get()
+    читает БД асинхронным ORM.
+    """
+
+    def check_caches(self, request):
+        """(etag, ключ кэша страницы, готовый ответ или None)."""
+        etag = key = None
+        if isinstance(self, ConditionalGetMixin):
+            etag, response = self.get_not_modified(request)
+            if response is not None:
+                return etag, key, response
+        if isinstance(self, AnonymousPageCacheMixin):
+            key, response = self.get_cached_page(request)
+            if response is not None:
+                # Страница из кэша не кэшируется заново.
+                return etag, None, response
+        return etag, key, None
+
+    def finish_response(self, response, etag, key):
+        """Шаги синхронного dispatch после get(): кэш страницы и ETag."""
+        if isinstance(self, AnonymousPageCacheMixin):
+            self.cache_page(key, response)
+        if isinstance(self, ConditionalGetMixin):
+            self.set_etag(response, etag)
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if request.method not in ('GET', 'HEAD'):
+            return await self.http_method_not_allowed(
+                request, *args, **kwargs
+            )
+
+        etag, key, response = await sync_to_async(self.check_caches)(
+            request
+        )
+        if response is None:
+            response = await self.get(request, *args, **kwargs)
+        elif response.status_code == HTTPStatus.NOT_MODIFIED:
+            return response
+        await sync_to_async(self.finish_response)(response, etag, key)
+        return response
+
+
+class AsyncFeedMixin(AsyncReadMixin):
+    """Асинхронный get() для лент на основе FeedPaginationMixin."""
+
+    _pagination = None
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = await sync_to_async(self.get_queryset)()
+        self._pagination = await self.apaginate_queryset(
+            self.object_list, self.get_paginate_by(self.object_list)
+        )
+        return self.render_to_response(self.get_context_data())
+
+    def paginate_queryset(self, queryset, page_size):
+        return self._pagination
@@ -1,13 +1,27 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.text import Truncator
 from django.utils.translation import gettext_lazy as _
 
-from .const import MAX_LENGTH_SELF_TITLE, MAX_LENGTH_TITLE_FIELDS
+from .const import (EXCERPT_WORDS, MAX_LENGTH_SELF_TITLE,
+                    MAX_LENGTH_TITLE_FIELDS)
+from .fields import ImagePreviewField, RenderedTextField
+from .images import read_size
+from .storage import get_image_storage
 
 User = get_user_model()
 
 
+def with_update_fields(kwargs, source, *derived):
+    """Добавляет вычисляемые поля в update_fields, если сохраняется source."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and source in update_fields:
+        kwargs['update_fields'] = {*update_fields, *derived}
+    return kwargs
+
+
 class PublishAbstractModel(models.Model):
     """Абстрактная модель с общими полями публикации."""
 
@@ -25,6 +39,40 @@ class PublishAbstractModel(models.Model):
         abstract = True
 
 
+class PostQuerySet(models.QuerySet):
+
+    def image_refcounts(self, names):
+        """Сколько постов ссылается на каждый из файлов `names`."""
+        counts = dict.fromkeys(names, 0)
+        counts.update(
+            self.filter(image__in=names)
+            .values_list('image')
+            .annotate(refs=models.Count('pk'))
+            .order_by()
+        )
+        return counts
+
+    # У маленьких изображений копий нет, поэтому признак обработки
+    # воркером - заглушка, а не непустой список ширин.
+    processed_image = models.Q(image_preview__has_key='placeholder')
+
+    def with_processed_image(self):
+        """Посты, чьё изображение воркер уже обработал."""
+        return self.filter(self.processed_image)
+
+    def without_processed_image(self):
+        """Посты, чьё изображение ещё ждёт копий и заглушки."""
+        return self.exclude(self.processed_image)
+
+    def with_taxonomy(self):
+        """Категория и местоположение - из реестра в памяти, без JOIN."""
+        from .registry import TaxonomyIterable
+
+        clone = self._chain()
+        clone._iterable_class = TaxonomyIterable
+        return clone
+
+
 class Post(PublishAbstractModel):
     """Публикация."""
 
@@ -65,19 +113,108 @@ class Post(PublishAbstractModel):
     image = models.ImageField(
         _('Изображение'),
         upload_to='posts/',
+        storage=get_image_storage,
         blank=True,
-        null=True
+        null=True,
+        db_index=True
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Анонс'
+    )
+    text_html = RenderedTextField(verbose_name='Текст в HTML')
+    image_widths = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name='Ширины уменьшенных копий изображения'
+    )
+    image_preview = ImagePreviewField(
+        verbose_name='Размеры и заглушка изображения'
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = 'posts'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_published_feed_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+        )
 
         def __str__(self):
             return f"{self.title[:MAX_LENGTH_SELF_TITLE]}"
 
+    @staticmethod
+    def make_excerpt(text):
+        """Анонс поста: как фильтр truncatewords в карточке."""
+        return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+    def find_processed_image(self, name):
+        """Копии и заглушка файла `name` у другого поста или None."""
+        return (
+            Post.objects.filter(image=name)
+            .exclude(pk=self.pk)
+            .with_processed_image()
+            .values_list('image_widths', 'image_preview')
+            .first()
+        )
+
+    def save(self, *args, **kwargs):
+        self.excerpt = self.make_excerpt(self.text)
+        new_image = bool(self.image) and not self.image._committed
+        if new_image:
+            # Файл сохраняется заранее, как в FileField.pre_save: по имени
+            # из хэша видно, есть ли уже копии этого изображения.
+            self.image.save(self.image.name, self.image.file, save=False)
+            processed = self.find_processed_image(self.image.name)
+            if processed:
+                self.image_widths, self.image_preview = processed
+                new_image = False
+            else:
+                # Пока воркер не нарезал копии, карточка выводит оригинал
+                # в блоке заранее известного размера.
+                self.image_widths = []
+                self.image_preview = read_size(
+                    self.image.storage, self.image.name
+                )
+        elif not self.image:
+            self.image_widths = []
+            self.image_preview = {}
+        kwargs = with_update_fields(
+            kwargs, 'image', 'image_widths', 'image_preview'
+        )
+        kwargs = with_update_fields(kwargs, 'text', 'excerpt', 'text_html')
+        if not new_image:
+            super().save(*args, **kwargs)
+            return
+        # Пост и задача пишутся в одной транзакции: не останется ни задачи
+        # без поста, ни поста с изображением без задачи.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ImageJob.objects.create(post=self, image_name=self.image.name)
+
 
 class Category(PublishAbstractModel):
     """Тематическая категория."""
@@ -126,6 +263,7 @@ class Comment(models.Model):
     """Комментарий."""
 
     text = models.TextField('Ваш комментарий')
+    text_html = RenderedTextField(verbose_name='Комментарий в HTML')
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -145,6 +283,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx',
+            ),
+        )
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -152,3 +296,67 @@ class Comment(models.Model):
         return f"Комментарий от {
             self.author.username
         } к посту {self.post.pk}: {self.text[:MAX_LENGTH_SELF_TITLE]}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **with_update_fields(kwargs, 'text', 'text_html'))
+
+
+class ImageJob(models.Model):
+    """Задача фоновой нарезки копий изображения поста."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('В очереди')
+        RUNNING = 'running', _('Выполняется')
+        FAILED = 'failed', _('Ошибка')
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация'
+    )
+    image_name = models.CharField(
+        max_length=255,
+        verbose_name='Файл изображения'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить после'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взята воркером'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+
+    class Meta:
+        ordering = ('run_after',)
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='imagejob_due_idx',
+            ),
+        )
+        verbose_name = 'задача обработки изображения'
+        verbose_name_plural = 'Задачи обработки изображений'
+
+    def __str__(self):
+        return f'{self.image_name} ({self.get_status_display()})'
@@ -0,0 +1,248 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import get_version
+from .const import (FEED_COUNT_CACHE_TIMEOUT, PAGINATOR_ON_EACH_SIDE,
+                    PAGINATOR_ON_ENDS)
+from .visibility import get_visibility_epoch
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(value, pk):
+    """Курсор вида `<микросекунды от эпохи>.<id>`, безопасный для URL."""
+    return f'{(value - EPOCH) // timedelta(microseconds=1)}.{pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        micros, pk = cursor.split('.')
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, OverflowError):
+        raise InvalidPage('Некорректный курсор.')
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации с интерфейсом `page_obj`."""
+
+    number = None
+
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def _cursor(self, obj):
+        return encode_cursor(getattr(obj, self.paginator.field), obj.pk)
+
+    @property
+    def next_page_query(self):
+        """GET-параметр для следующей страницы (в порядке вывода)."""
+        key = 'before' if self.paginator.descending else 'after'
+        return f'{key}={self._cursor(self.object_list[-1])}'
+
+    @property
+    def next_cursor_query(self):
+        """Курсор продолжения ленты для фрагмента бесконечной прокрутки."""
+        return self.next_page_query
+
+    @property
+    def previous_page_query(self):
+        """GET-параметр для предыдущей страницы (в порядке вывода)."""
+        key = 'after' if self.paginator.descending else 'before'
+        return f'{key}={self._cursor(self.object_list[0])}'
+
+
+class CursorPaginator:
+    """Пагинация по ключу (field, id): без OFFSET и без COUNT(*).
+
+    `before` выбирает объекты со значением ключа меньше курсора,
+    `after` - больше. Стоимость любой страницы одинакова.
+    """
+
+    is_cursor = True
+    page_range = ()
+    num_pages = None
+
+    def __init__(self, object_list, per_page, field='pub_date',
+                 descending=True):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.field = field
+        self.descending = descending
+
+    def _seek(self, cursor, lookup):
+        value, pk = decode_cursor(cursor)
+        return self.object_list.filter(
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'pk__{lookup}': pk})
+        )
+
+    def _ordered(self, queryset, descending):
+        sign = '-' if descending else ''
+        return queryset.order_by(f'{sign}{self.field}', f'{sign}pk')
+
+    def forward(self, cursor=None):
+        """Срез per_page + 1 объектов после курсора в порядке вывода.
+
+        Лишний объект показывает, есть ли продолжение; срез не вычислен,
+        его можно читать потоком через iterator().
+        """
+        lookup = 'lt' if self.descending else 'gt'
+        queryset = self._seek(cursor, lookup) if cursor else self.object_list
+        return self._ordered(queryset, self.descending)[:self.per_page + 1]
+
+    def _build_page(self, before, after):
+        """Шаги построения страницы: отдаёт срезы, получает их строки.
+
+        Логика одна для page() и apage(), различается только то,
+        как вычисляются срезы.
+        """
+        if before and after:
+            raise InvalidPage('Укажите только один курсор.')
+        cursor, lookup = (before, 'lt') if before else (after, 'gt')
+        forward = lookup == ('lt' if self.descending else 'gt')
+
+        if cursor and not forward:
+            rows = yield self._ordered(
+                self._seek(cursor, lookup), not self.descending
+            )[:self.per_page + 1]
+            if len(rows) > self.per_page:
+                return CursorPage(
+                    rows[self.per_page - 1::-1], self,
+                    has_previous=True, has_next=True,
+                )
+            # Дошли до начала ленты - показываем первую страницу целиком.
+            cursor = None
+
+        queryset = self._seek(cursor, lookup) if cursor else self.object_list
+        rows = yield self._ordered(
+            queryset, self.descending
+        )[:self.per_page + 1]
+        if cursor and not rows:
+            raise InvalidPage('На этой странице нет результатов.')
+        return CursorPage(
+            rows[:self.per_page], self,
+            has_previous=cursor is not None,
+            has_next=len(rows) > self.per_page,
+        )
+
+    def page(self, before=None, after=None):
+        steps = self._build_page(before, after)
+        try:
+            queryset = next(steps)
+            while True:
+                queryset = steps.send(list(queryset))
+        except StopIteration as result:
+            return result.value
+
+    async def apage(self, before=None, after=None):
+        steps = self._build_page(before, after)
+        try:
+            queryset = next(steps)
+            while True:
+                queryset = steps.send([obj async for obj in queryset])
+        except StopIteration as result:
+            return result.value
+
+
+class WindowedPage(Page):
+    """Страница с укороченным списком номеров соседних страниц."""
+
+    @property
+    def next_cursor_query(self):
+        """Курсор продолжения ленты после последнего поста страницы."""
+        last = self[-1]
+        return f'before={encode_cursor(last.pub_date, last.pk)}'
+
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(
+            self.number,
+            on_each_side=PAGINATOR_ON_EACH_SIDE,
+            on_ends=PAGINATOR_ON_ENDS,
+        )
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор ленты с кэшированным COUNT(*).
+
+    Количество хранится под ключом ленты, версией `posts`, которая
+    меняется при любом изменении постов или категорий, и эпохой видимости.
+    """
+
+    def __init__(self, *args, cache_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+
+    def get_count_key(self):
+        return (
+            f'blog:feed-count:{get_version("posts")}:'
+            f'{get_visibility_epoch().token}:{self.cache_key}'
+        )
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return super().count
+        key = self.get_count_key()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, FEED_COUNT_CACHE_TIMEOUT)
+        return count
+
+    async def acount(self):
+        """Количество постов для асинхронных представлений."""
+        if 'count' not in self.__dict__:
+            key = None
+            count = None
+            if self.cache_key is not None:
+                key = await sync_to_async(self.get_count_key)()
+                count = await cache.aget(key)
+            if count is None:
+                count = await self.object_list.acount()
+                if key is not None:
+                    await cache.aset(key, count, FEED_COUNT_CACHE_TIMEOUT)
+            self.__dict__['count'] = count
+        return self.count
+
+    async def apage(self, number):
+        """Страница по номеру, строки читаются асинхронным ORM."""
+        await self.acount()
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        rows = [obj async for obj in self.object_list[bottom:top]]
+        return self._get_page(rows, number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
@@ -0,0 +1,53 @@
+from django.db.models.query import ModelIterable
+
+from .cache import get_version
+from .models import Category, Location
+
+_registry = None
+
+
+class TaxonomyRegistry:
+    """Все категории и местоположения в памяти процесса.
+
+    Таблицы маленькие и меняются редко. Реестр перечитывается, когда
+    сигналы в любом процессе меняют версию `taxonomy` в общем кэше.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.categories = {
+            category.pk: category for category in Category.objects.all()
+        }
+        self.categories_by_slug = {
+            category.slug: category for category in self.categories.values()
+        }
+        self.locations = {
+            location.pk: location for location in Location.objects.all()
+        }
+
+    def get_category(self, slug):
+        return self.categories_by_slug.get(slug)
+
+
+def get_registry():
+    """Актуальный реестр: одно обращение к общему кэшу за версией."""
+    global _registry
+    version = get_version('taxonomy')
+    if _registry is None or _registry.version != version:
+        _registry = TaxonomyRegistry(version)
+    return _registry
+
+
+class TaxonomyIterable(ModelIterable):
+    """Подставляет постам категорию и местоположение из реестра."""
+
+    def __iter__(self):
+        registry = get_registry()
+        for post in super().__iter__():
+            category = registry.categories.get(post.category_id)
+            if category is not None:
+                post.category = category
+            location = registry.locations.get(post.location_id)
+            if location is not None:
+                post.location = location
+            yield post
@@ -0,0 +1,97 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .models import Category, Comment, Location, Post
+from .visibility import reset_visibility_epoch
+
+User = get_user_model()
+
+# Вход пользователя сохраняет только last_login - на вывод это не влияет.
+LOGIN_UPDATE_FIELDS = frozenset({'last_login'})
+
+
+def on_commit_again(func, *args):
+    """Вызывает сброс сейчас и ещё раз после фиксации транзакции.
+
+    Первый вызов нужен чтениям в той же транзакции. Другой процесс до
+    фиксации успеет заполнить кэш ещё не изменёнными строками уже под
+    новой версией - повторный сброс после фиксации их отбрасывает.
+    """
+    func(*args)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(func, *args))
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """Увеличивает счётчик комментариев поста при создании комментария."""
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+    on_commit_again(bump_version, f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, origin=None, **kwargs):
+    """Уменьшает счётчик комментариев поста при удалении комментария."""
+    origin_model = (
+        origin.model if isinstance(origin, QuerySet) else type(origin)
+    )
+    if origin_model is Post:
+        # Пост удаляется вместе с комментариями - счётчик не нужен.
+        return
+    Post.objects.filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+    on_commit_again(bump_version, f'post:{instance.post_id}')
+
+
+@receiver((post_save, post_delete), sender=Post)
+@receiver((post_save, post_delete), sender=Category)
+def invalidate_feeds(sender, instance, **kwargs):
+    """Сбрасывает закэшированные данные лент постов."""
+    on_commit_again(
+        bump_version, 'posts', f'{sender._meta.model_name}:{instance.pk}'
+    )
+    if sender is Post:
+        on_commit_again(reset_visibility_epoch)
+
+
+@receiver((post_save, post_delete), sender=Category)
+@receiver((post_save, post_delete), sender=Location)
+def invalidate_registry(sender, **kwargs):
+    """Заставляет процессы перечитать реестр категорий и местоположений."""
+    on_commit_again(bump_version, 'taxonomy')
+
+
+@receiver((post_save, post_delete), sender=Location)
+@receiver((post_save, post_delete), sender=User)
+def invalidate_post_cards(sender, instance, update_fields=None, **kwargs):
+    """Сбрасывает карточки постов с этим местоположением или автором."""
+    if update_fields == LOGIN_UPDATE_FIELDS:
+        return
+    names = [f'{sender._meta.model_name}:{instance.pk}']
+    if sender is User and not kwargs.get('created'):
+        # Имена авторов постов и комментариев на странице поста; нового
+        # пользователя там ещё нет.
+        names.append('users')
+    on_commit_again(bump_version, *names)
+
+
+@receiver((post_save, post_delete), sender=Post)
+@receiver((post_save, post_delete), sender=Category)
+@receiver((post_save, post_delete), sender=Location)
+@receiver((post_save, post_delete), sender=Comment)
+@receiver((post_save, post_delete), sender=User)
+def invalidate_pages(sender, update_fields=None, **kwargs):
+    """Сбрасывает полностраничный кэш для анонимных читателей."""
+    if update_fields == LOGIN_UPDATE_FIELDS:
+        return
+    on_commit_again(bump_version, 'pages')
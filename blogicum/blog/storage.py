@@ -0,0 +1,45 @@
+import hashlib
+import os
+from pathlib import PurePosixPath
+
+from django.core.files.storage import FileSystemStorage
+
+from .images import VARIANTS_DIR
+
+
+def content_name(name, content):
+    """Имя по SHA-256 содержимого: posts/a.JPG -> posts/<sha256>.jpg."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    path = PurePosixPath(name)
+    return str(path.parent / f'{digest.hexdigest()}{path.suffix.lower()}')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по хэшу содержимого.
+
+    Одинаковые загрузки разных постов ссылаются на один файл. Файлы,
+    на которые не ссылается ни один пост, удаляет команда
+    collect_orphan_images. Копии изображений уже названы по хэшу
+    исходника и сохраняются под своими именами.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if PurePosixPath(name).parent.name == VARIANTS_DIR:
+            return super().save(name, content, max_length)
+        name = content_name(name, content)
+        if not self.exists(name):
+            return super().save(name, content, max_length)
+        # Файл уже загружен: не пишем его повторно, а обновляем время
+        # изменения, чтобы сборщик мусора не удалил его до сохранения поста.
+        os.utime(self.path(name))
+        return name
+
+
+def get_image_storage():
+    return ContentAddressedStorage()
@@ -0,0 +1,57 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from ..cache import get_versions
+from ..const import IMAGE_SIZES, POST_CARD_CACHE_TIMEOUT
+from ..images import WEBP, get_srcset, variant_name
+
+register = template.Library()
+
+
+def get_post_card_key(post):
+    """Ключ карточки: id поста и версии всего, что в ней выводится."""
+    versions = get_versions(
+        f'post:{post.pk}',
+        f'category:{post.category_id}',
+        f'location:{post.location_id}',
+        f'user:{post.author_id}',
+    )
+    return f'blog:post-card:{post.pk}:{":".join(versions)}'
+
+
+@register.simple_tag
+def post_card(post):
+    """Карточка поста для лент, отрендеренная один раз и взятая из кэша."""
+    key = get_post_card_key(post)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string('includes/post_card.html', {'post': post})
+        cache.set(key, html, POST_CARD_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, css_class='', sizes=IMAGE_SIZES, lazy=False):
+    """Изображение поста с копиями разной ширины в srcset и WebP.
+
+    Размеры из image_preview резервируют место под изображение, заглушка
+    видна до его загрузки; с lazy браузер загружает его у края экрана.
+    """
+    image = post.image
+    widths = post.image_widths
+    context = {
+        'css_class': css_class,
+        'sizes': sizes,
+        'src': image.url,
+        'preview': post.image_preview,
+        'lazy': lazy,
+    }
+    if widths:
+        context.update(
+            src=image.storage.url(variant_name(image.name, widths[-1])),
+            srcset=get_srcset(image, widths),
+            webp_srcset=get_srcset(image, widths, WEBP),
+        )
+    return context
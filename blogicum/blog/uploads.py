@@ -0,0 +1,79 @@
+from io import BytesIO
+
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from PIL import Image
+
+from .const import (IMAGE_HEADER_MAX_BYTES, IMAGE_UPLOAD_MAX_PIXELS,
+                    IMAGE_UPLOAD_MAX_SIZE)
+
+TOO_LARGE_FILE = (
+    f'Размер файла не должен превышать '
+    f'{IMAGE_UPLOAD_MAX_SIZE // 2 ** 20} МБ.'
+)
+TOO_MANY_PIXELS = (
+    f'Изображение не должно быть больше '
+    f'{IMAGE_UPLOAD_MAX_PIXELS // 10 ** 6} мегапикселей.'
+)
+
+
+def open_image_header(source):
+    """Открывает изображение, читая только заголовок.
+
+    Пиксели не декодируются; размер проверяется до всякой распаковки.
+    Бросает Image.DecompressionBombError для слишком больших изображений
+    и OSError, если заголовок не распознан.
+    """
+    image = Image.open(source)
+    width, height = image.size
+    if width * height > IMAGE_UPLOAD_MAX_PIXELS:
+        raise Image.DecompressionBombError(TOO_MANY_PIXELS)
+    return image
+
+
+class ImageLimitsUploadHandler(FileUploadHandler):
+    """Проверяет загружаемые файлы на лету, не сохраняя их сам.
+
+    Ставится первым в request.upload_handlers представлениями формы
+    поста (ImageUploadMixin) и передаёт данные дальше без изменений.
+    Считает байты файла и по первым блокам читает заголовок изображения.
+    Слишком большой файл или "бомба распаковки" останавливают разбор
+    запроса до того, как файл прочитан целиком; причина попадает
+    в request.upload_errors, откуда её берёт форма.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b''
+        if (self.content_length is not None
+                and self.content_length > IMAGE_UPLOAD_MAX_SIZE):
+            self.reject(TOO_LARGE_FILE)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > IMAGE_UPLOAD_MAX_SIZE:
+            self.reject(TOO_LARGE_FILE)
+        if self.header is not None:
+            self.check_header(raw_data)
+        return raw_data
+
+    def check_header(self, raw_data):
+        self.header += raw_data
+        try:
+            open_image_header(BytesIO(self.header))
+        except Image.DecompressionBombError:
+            self.reject(TOO_MANY_PIXELS)
+        except OSError:
+            if len(self.header) < IMAGE_HEADER_MAX_BYTES:
+                # Заголовок ещё не дочитан - ждём следующий блок.
+                return
+            # Не изображение: это решит валидация формы.
+        self.header = None
+
+    def reject(self, message):
+        self.request.upload_errors = {
+            **getattr(self.request, 'upload_errors', {}),
+            self.field_name: message,
+        }
+        raise StopUpload(connection_reset=True)
+
+    def file_complete(self, file_size):
+        return None
@@ -1,17 +1,29 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, async_views, views
 
 app_name = 'blog'
 
+if settings.BLOG_ASYNC_VIEWS:
+    IndexListView = async_views.AsyncIndexListView
+    PostDetailView = async_views.AsyncPostDetailView
+    CategoryListView = async_views.AsyncCategoryListView
+    UserListView = async_views.AsyncUserListView
+else:
+    IndexListView = views.IndexListView
+    PostDetailView = views.PostDetailView
+    CategoryListView = views.CategoryListView
+    UserListView = views.UserListView
+
 urlpatterns = [
-    path('', views.IndexListView.as_view(), name='index'),
-    path('posts/<int:post_id>/', views.PostDetailView.as_view(),
+    path('', IndexListView.as_view(), name='index'),
+    path('posts/<int:post_id>/', PostDetailView.as_view(),
          name='post_detail'),
-    path('category/<slug:category_slug>/', views.CategoryListView.as_view(),
+    path('category/<slug:category_slug>/', CategoryListView.as_view(),
          name='category_posts'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
-    path('profile/<str:username>/', views.UserListView.as_view(),
+    path('profile/<str:username>/', UserListView.as_view(),
          name='profile'),
 
 
@@ -23,6 +35,10 @@ urlpatterns = [
          name='edit_post'),
     path('posts/<int:post_id>/delete/', views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('posts/<int:post_id>/comments/', views.CommentListView.as_view(),
+         name='comments'),
+    path('posts/<int:post_id>/comments/stream/',
+         views.CommentStreamView.as_view(), name='comment_stream'),
     path('posts/<int:post_id>/comment/', views.CommentCreateView.as_view(),
          name='add_comment'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>/',
@@ -30,6 +46,12 @@ urlpatterns = [
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
          views.CommentDeleteView.as_view(), name='delete_comment'),
 
+    path('api/posts/', api.PostListApiView.as_view(), name='api_posts'),
+    path('api/posts/<int:post_id>/comments/',
+         api.CommentListApiView.as_view(), name='api_comments'),
+    path('api/category/<slug:category_slug>/',
+         api.CategoryPostListApiView.as_view(), name='api_category_posts'),
+
     path('password/change/',
          views.CustomPasswordChangeView.as_view(),
          name='password_change'),
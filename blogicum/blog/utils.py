@@ -1,26 +1,91 @@
-from django.db.models import Count
+import math
+
+from django.core.paginator import InvalidPage
+from django.http import Http404
 from django.utils import timezone
 
+from .const import COMMENTS_RELEASE_LIMIT, PAGE_CACHE_TIMEOUT
 from .models import Post
+from .paginators import CursorPaginator
+from .visibility import get_visibility_epoch
 
 
 def get_posts_queryset(
     apply_filters=True,
-    count_comments=True,
     base_queryset=None
 ):
+    """Лента публикаций со всеми связанными объектами для карточки поста.
 
-    queryset = base_queryset or Post.objects.all()
+    Автор присоединяется в том же запросе, категория и местоположение
+    берутся из реестра в памяти. Полный текст не читается - в карточке
+    выводится сохранённый анонс.
+    """
+    if base_queryset is None:
+        base_queryset = Post.objects.all()
+    queryset = base_queryset
 
     if apply_filters:
         filter_dict = {
             'is_published': True,
-            'pub_date__lte': timezone.now(),
+            'pub_date__lte': get_visibility_epoch().as_of,
             'category__is_published': True
         }
         queryset = queryset.filter(**filter_dict)
 
-    if count_comments:
-        queryset = queryset.annotate(comment_count=Count('comments'))
+    return queryset.select_related('author').with_taxonomy().defer(
+        'text', 'text_html'
+    ).order_by('-pub_date', '-pk')
+
+
+def is_post_visible(post):
+    """Виден ли пост всем: те же условия, что и в get_posts_queryset."""
+    return (
+        post.is_published
+        and post.pub_date <= timezone.now()
+        and post.category is not None
+        and post.category.is_published
+    )
+
+
+def check_post_visibility(post, user):
+    """Чужой неопубликованный или отложенный пост - 404."""
+    if post.author_id != user.pk and not is_post_visible(post):
+        raise Http404('Публикация не найдена.')
+
+
+def get_comments_paginator(post):
+    return CursorPaginator(
+        post.comments.select_related('author').defer('text'),
+        COMMENTS_RELEASE_LIMIT,
+        field='created_at',
+        descending=False
+    )
+
+
+def get_comments_page(post, request):
+    """Порция комментариев поста после курсора ?after= (created_at, id)."""
+    try:
+        return get_comments_paginator(post).page(
+            after=request.GET.get('after')
+        )
+    except InvalidPage as e:
+        raise Http404(str(e))
+
+
+async def aget_comments_page(post, request):
+    """get_comments_page() для асинхронных представлений."""
+    try:
+        return await get_comments_paginator(post).apage(
+            after=request.GET.get('after')
+        )
+    except InvalidPage as e:
+        raise Http404(str(e))
+
 
-    return queryset.order_by('-pub_date')
+def get_page_cache_timeout():
+    """Время жизни страницы: не дольше, чем до ближайшей публикации."""
+    next_pub_date = get_visibility_epoch().next_change
+    if next_pub_date is None:
+        return PAGE_CACHE_TIMEOUT
+    seconds = (next_pub_date - timezone.now()).total_seconds()
+    return min(PAGE_CACHE_TIMEOUT, max(math.ceil(seconds), 1))
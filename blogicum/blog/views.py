@@ -1,3 +1,6 @@
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model, update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm, UserCreationForm
@@ -8,21 +11,36 @@ from django.contrib.auth.views import (PasswordChangeDoneView,
                                        PasswordResetConfirmView,
                                        PasswordResetDoneView,
                                        PasswordResetView)
-from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
+from django.views import View
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
-                                  UpdateView)
+                                  TemplateView, UpdateView)
 
-from .const import POSTS_RELEASE_LIMIT
+from .const import (COMMENTS_RELEASE_LIMIT, EVENTS_HEARTBEAT, EVENTS_RETRY,
+                    POSTS_RELEASE_LIMIT)
+from .events import (comment_event, format_sse, get_hub, post_channel,
+                     publish_comment)
 from .forms import CommentForm, PostCreateForm, UserEditForm
-from .mixins import AuthorTestMixin, BaseUserMixin, ReverseMixin
-from .models import Category, Comment, Post
-from .utils import get_posts_queryset
+from .mixins import (AnonymousPageCacheMixin, AuthorTestMixin, BaseUserMixin,
+                     CommentFragmentMixin, ConditionalGetMixin,
+                     FeedConditionalGetMixin, FeedPaginationMixin,
+                     ImageUploadMixin, ObjectCacheMixin, ReverseMixin)
+from .models import Comment, Post
+from .registry import get_registry
+from .utils import (check_post_visibility, get_comments_page,
+                    get_posts_queryset)
 
 User = get_user_model()
 
 
-class IndexListView(ListView):
+class IndexListView(
+    FeedConditionalGetMixin,
+    AnonymousPageCacheMixin,
+    FeedPaginationMixin,
+    ListView
+):
     """Главная страница сайта."""
 
     model = Post
@@ -33,56 +51,163 @@ class IndexListView(ListView):
         return get_posts_queryset()
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ConditionalGetMixin, ObjectCacheMixin, DetailView):
     """Отдельный пост."""
 
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
+    create_etag_versions = False
 
-    def get_object(self):
-        obj = super().get_object()
-        post_id = self.kwargs.get(self.pk_url_kwarg)
+    def get_queryset(self):
+        return Post.objects.select_related('author').with_taxonomy()
 
-        if obj.author == self.request.user:
-            return obj
-        return get_object_or_404(get_posts_queryset(), id=post_id)
+    def get_etag_versions(self):
+        """Версии самого поста, а не всего сайта.
+
+        `post:<id>` меняется при правке поста и его комментариев,
+        `taxonomy` - категорий и местоположений, `users` - профилей.
+        """
+        return (
+            f'post:{self.kwargs[self.pk_url_kwarg]}', 'taxonomy', 'users'
+        )
+
+    def get_object(self, queryset=None):
+        obj = super().get_object(queryset)
+        check_post_visibility(obj, self.request.user)
+        return obj
+
+    def get_comments(self):
+        return get_comments_page(self.object, self.request)
+
+    def get_comment_stream_url(self, comments):
+        """Адрес SSE-потока комментариев; под WSGI потока нет.
+
+        ?after= - последний показанный комментарий: поток дошлёт
+        оставленные между рендером страницы и подключением. Если ветка
+        показана не вся, они придут со следующей порцией комментариев.
+        """
+        if not settings.BLOG_ASYNC_VIEWS:
+            return None
+        url = reverse('blog:comment_stream', args=(self.object.pk,))
+        if comments.has_next():
+            return url
+        return f'{url}?after={comments[-1].pk if comments else 0}'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('author')
+        context['comments'] = self.get_comments()
+        context['comment_stream'] = self.get_comment_stream_url(
+            context['comments']
+        )
+        return context
+
+
+class CommentListView(TemplateView):
+    """Очередная порция комментариев к посту (HTML-фрагмент)."""
+
+    template_name = 'blog/comments.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        post = get_object_or_404(
+            Post.objects.with_taxonomy(),
+            pk=self.kwargs['post_id']
+        )
+        check_post_visibility(post, self.request.user)
+        context['post'] = post
+        context['comments'] = get_comments_page(post, self.request)
         return context
 
 
-class CategoryListView(ListView):
+class CommentStreamView(View):
+    """SSE-поток новых комментариев к посту.
+
+    Держит одно долгое соединение на читателя вместо опроса страницы,
+    поэтому обслуживается через ASGI. Досылает комментарии, пропущенные
+    после Last-Event-ID или ?after=.
+    """
+
+    async def get(self, request, post_id):
+        if not settings.BLOG_ASYNC_VIEWS:
+            # Под WSGI бесконечный поток занял бы поток сервера навсегда;
+            # ответ 204 велит EventSource больше не переподключаться.
+            return HttpResponse(status=HTTPStatus.NO_CONTENT)
+        post = await aget_object_or_404(
+            Post.objects.with_taxonomy(), pk=post_id
+        )
+        check_post_visibility(post, await request.auser())
+        # При переподключении EventSource сам присылает Last-Event-ID,
+        # при первом - ?after= из страницы поста.
+        try:
+            last_id = int(
+                request.headers.get('Last-Event-ID', request.GET.get('after'))
+            )
+        except (TypeError, ValueError):
+            last_id = None
+        response = StreamingHttpResponse(
+            self.stream(post, last_id), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def get_missed_events(self, post, last_id):
+        return [
+            comment_event(comment)
+            for comment in post.comments.select_related('author').filter(
+                pk__gt=last_id
+            )[:COMMENTS_RELEASE_LIMIT]
+        ]
+
+    async def stream(self, post, last_id):
+        async with get_hub().subscribe(post_channel(post.pk)) as events:
+            yield f'retry: {EVENTS_RETRY}\n\n'
+            sent_id = last_id or 0
+            if last_id is not None:
+                missed = await sync_to_async(self.get_missed_events)(
+                    post, last_id
+                )
+                for event in missed:
+                    sent_id = event['id']
+                    yield format_sse(event)
+            while True:
+                event = await events.get(timeout=EVENTS_HEARTBEAT)
+                if event is None:
+                    yield ': ping\n\n'
+                elif event['id'] > sent_id:
+                    yield format_sse(event)
+
+
+class CategoryListView(
+    FeedConditionalGetMixin,
+    AnonymousPageCacheMixin,
+    FeedPaginationMixin,
+    ListView
+):
     """Категория постов."""
 
     paginate_by = POSTS_RELEASE_LIMIT
     template_name = 'blog/category.html'
 
     def get_queryset(self):
-        category_slug = self.kwargs['category_slug']
-        category = get_object_or_404(
-            Category,
-            slug=category_slug,
-            is_published=True
+        self.category = get_registry().get_category(
+            self.kwargs['category_slug']
         )
+        if self.category is None or not self.category.is_published:
+            raise Http404('Категория не найдена.')
         return get_posts_queryset(
-            base_queryset=category.posts.all(),
+            base_queryset=self.category.posts.all(),
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['category'] = get_object_or_404(
-            Category,
-            slug=self.kwargs['category_slug'],
-            is_published=True
-        )
+        context['category'] = self.category
         return context
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(LoginRequiredMixin, ImageUploadMixin, CreateView):
     """Создание нового поста."""
 
     model = Post
@@ -104,6 +229,7 @@ class PostUpdateView(
     LoginRequiredMixin,
     AuthorTestMixin,
     ReverseMixin,
+    ImageUploadMixin,
     UpdateView
 ):
     """Редактирование существующего поста."""
@@ -128,10 +254,12 @@ class PostDeleteView(
     template_name = 'blog/create.html'
     pk_url_kwarg = 'post_id'
 
+    def get_queryset(self):
+        return Post.objects.with_taxonomy()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        instance = self.get_object()
-        form = PostCreateForm(self.request.POST, instance=instance)
+        form = PostCreateForm(self.request.POST, instance=self.object)
         context['form'] = form
         return context
 
@@ -142,7 +270,12 @@ class PostDeleteView(
         )
 
 
-class CommentCreateView(LoginRequiredMixin, ReverseMixin, CreateView):
+class CommentCreateView(
+    LoginRequiredMixin,
+    CommentFragmentMixin,
+    ReverseMixin,
+    CreateView
+):
     """Создание комментария к посту."""
 
     post_obj = None
@@ -150,15 +283,20 @@ class CommentCreateView(LoginRequiredMixin, ReverseMixin, CreateView):
     form_class = CommentForm
 
     def form_valid(self, form):
-        post_obj = get_object_or_404(Post, pk=self.kwargs['post_id'])
+        post_obj = get_object_or_404(
+            Post.objects.only('pk'), pk=self.kwargs['post_id']
+        )
         form.instance.author = self.request.user
         form.instance.post = post_obj
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        publish_comment(self.object)
+        return response
 
 
 class CommentUpdateView(
     LoginRequiredMixin,
     AuthorTestMixin,
+    CommentFragmentMixin,
     ReverseMixin,
     UpdateView
 ):
@@ -173,6 +311,7 @@ class CommentUpdateView(
 class CommentDeleteView(
     LoginRequiredMixin,
     AuthorTestMixin,
+    CommentFragmentMixin,
     ReverseMixin,
     DeleteView
 ):
@@ -191,21 +330,35 @@ class UserCreateView(CreateView):
     success_url = reverse_lazy('blog:index')
 
 
-class UserListView(BaseUserMixin, ListView):
+class UserListView(
+    FeedConditionalGetMixin,
+    AnonymousPageCacheMixin,
+    BaseUserMixin,
+    FeedPaginationMixin,
+    ListView
+):
     """Профиль пользователя."""
 
     model = User
     template_name = 'blog/profile.html'
     paginate_by = POSTS_RELEASE_LIMIT
 
+    def is_own_profile(self, author):
+        return (self.request.user.is_authenticated
+                and self.request.user == author)
+
+    def get_feed_key(self):
+        key = super().get_feed_key()
+        if self.is_own_profile(self.get_user_object()):
+            return f'{key}:own'
+        return key
+
     def get_queryset(self):
         author = self.get_user_object()
-        apply_filters = not (self.request.user.is_authenticated
-                             and self.request.user == author)
 
         return get_posts_queryset(
             base_queryset=author.posts.all(),
-            apply_filters=apply_filters
+            apply_filters=not self.is_own_profile(author)
         )
 
     def get_context_data(self, **kwargs):
@@ -0,0 +1,80 @@
+"""Эпоха видимости ленты: дата последней вышедшей публикации.
+
+Для опубликованных постов `pub_date__lte=as_of` равносильно
+`pub_date__lte=now`, но меняется, только когда выходит отложенный пост.
+"""
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from typing import NamedTuple, Optional
+
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import get_shared_cache
+from .const import EPOCH_STATE_TIMEOUT, EPOCH_UPCOMING_LIMIT
+from .models import Post
+
+EPOCH_KEY = 'blog:visibility-epoch'
+
+# Граница эпохи, когда ни один пост ещё не вышел.
+BEFORE_ANY_POST = datetime.min.replace(tzinfo=dt_timezone.utc)
+
+
+class VisibilityEpoch(NamedTuple):
+    as_of: datetime
+    next_change: Optional[datetime]
+
+    @property
+    def token(self):
+        """Строковое значение эпохи для ключей кэша и ETag."""
+        return self.as_of.isoformat()
+
+
+def _build_state():
+    now = timezone.now()
+    published = Post.objects.filter(is_published=True)
+    as_of = published.filter(pub_date__lte=now).aggregate(
+        as_of=Max('pub_date')
+    )['as_of']
+    upcoming = list(
+        published.filter(pub_date__gt=now)
+        .order_by('pub_date')
+        .values_list('pub_date', flat=True)[:EPOCH_UPCOMING_LIMIT]
+    )
+    return {
+        'as_of': as_of or BEFORE_ANY_POST,
+        'upcoming': upcoming,
+        'complete': len(upcoming) < EPOCH_UPCOMING_LIMIT,
+    }
+
+
+def get_visibility_epoch():
+    """Текущая эпоха видимости; обычно - одно обращение к кэшу."""
+    shared_cache = get_shared_cache()
+    state = shared_cache.get(EPOCH_KEY)
+    changed = state is None
+    if changed:
+        state = _build_state()
+
+    now = timezone.now()
+    upcoming = state['upcoming']
+    went_live = [pub_date for pub_date in upcoming if pub_date <= now]
+    if went_live:
+        state['as_of'] = went_live[-1]
+        state['upcoming'] = upcoming[len(went_live):]
+        if not state['upcoming'] and not state['complete']:
+            state = _build_state()
+        changed = True
+
+    if changed:
+        shared_cache.set(EPOCH_KEY, state, EPOCH_STATE_TIMEOUT)
+    upcoming = state['upcoming']
+    return VisibilityEpoch(
+        as_of=state['as_of'],
+        next_change=upcoming[0] if upcoming else None,
+    )
+
+
+def reset_visibility_epoch():
+    """Забывает список отложенных дат после изменения постов."""
+    get_shared_cache().delete(EPOCH_KEY)
@@ -3,5 +3,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+# Под ASGI ленты и страница поста обслуживаются асинхронными
+# представлениями: медленный клиент не занимает поток.
+os.environ.setdefault('BLOG_ASYNC_VIEWS', '1')
 
+# ASGI-сервер (например, `uvicorn blogicum.asgi:application`) нужен
+# для SSE-потоков комментариев: каждое соединение держит не поток
+# воркера, а корутину.
 application = get_asgi_application()
@@ -65,6 +65,36 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Страницы для анонимных читателей - отдельно от карточек, со своим
+    # пределом: страница весит в десятки раз больше карточки.
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+        'OPTIONS': {
+            'MAX_ENTRIES': 500,
+        },
+    },
+    # Версии кэшей и эпоха видимости - общие для всех процессов сервера.
+    # Версия на каждый пост, пользователя, категорию и местоположение:
+    # при стандартных 300 записях кэш вытеснял бы случайную треть версий,
+    # включая общие `pages` и `posts`. Неиспользуемые версии истекают
+    # (VERSION_TIMEOUT), так что предел - страховка от переполнения.
+    'shared': {
+        'BACKEND': 'blog.cache_backends.VersionFileCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+        },
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -104,8 +134,18 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
+# Асинхронные варианты лент и страницы поста; включается в asgi.py.
+BLOG_ASYNC_VIEWS = os.getenv('BLOG_ASYNC_VIEWS') == '1'
+
+# Локальный брокер событий SSE-потоков: общий для процессов одного хоста.
+BLOG_EVENTS_DIR = BASE_DIR / 'events'
+
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки больше 256 КБ пишутся во временный файл, а не держатся
+# в памяти процесса.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
 FROM_EMAIL = 'no-reply@yourdomain.com'
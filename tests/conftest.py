@@ -41,6 +41,36 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def shared_dirs(settings, tmp_path_factory, monkeypatch):
+    """Общий кэш и брокер событий - во временных каталогах теста.
+
+    Иначе тесты чистили бы версии запущенного сервера разработки
+    и оставляли события в его каталоге.
+    """
+    from blog import events
+
+    root = tmp_path_factory.mktemp("shared")
+    settings.CACHES = {
+        **settings.CACHES,
+        "shared": {**settings.CACHES["shared"], "LOCATION": root / "cache"},
+    }
+    settings.BLOG_EVENTS_DIR = root / "events"
+    monkeypatch.setattr(events, "_hub", None)
+    return root
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(shared_dirs):
+    from django.core.cache import caches
+
+    for cache in caches.all(initialized_only=False):
+        cache.clear()
+    yield
+    for cache in caches.all(initialized_only=False):
+        cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -133,6 +163,12 @@ def another_user_client(another_user):
     return client
 
 
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
 def get_post_list_context_key(
         user_client, page_url, page_load_err_msg, key_missing_msg
 ):
@@ -0,0 +1,122 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.registry import get_registry
+from blog.visibility import get_visibility_epoch
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_json(client: Client, url: str):
+    response = client.get(url)
+    assert response.status_code == 200, url
+    assert response.streaming
+    assert response["Content-Type"] == "application/json"
+    return json.loads(b"".join(response.streaming_content))
+
+
+@pytest.mark.parametrize("feed", ["posts", "category"])
+def test_api_posts_walk_with_cursor(
+        feed: str,
+        unlogged_client: Client,
+        many_posts_with_published_locations,
+):
+    posts = many_posts_with_published_locations
+    url = {
+        "posts": "/api/posts/",
+        "category": f"/api/category/{posts[0].category.slug}/",
+    }[feed]
+    expected = sorted(
+        posts, key=lambda post: (post.pub_date, post.id), reverse=True
+    )
+    get_registry()
+    get_visibility_epoch()
+    seen = []
+    query = f"?limit={N_PER_PAGE - 1}"
+    while query is not None:
+        with CaptureQueriesContext(connection) as ctx:
+            data = get_json(unlogged_client, url + query)
+        assert len(ctx.captured_queries) == 1, (
+            "Страница API должна читаться одним запросом."
+        )
+        seen.extend(data["results"])
+        query = data["next"] and (
+            f"?limit={N_PER_PAGE - 1}&cursor={data['next']}"
+        )
+    assert [item["id"] for item in seen] == [post.id for post in expected]
+    first = seen[0]
+    assert first["author"] == expected[0].author.username
+    assert first["category"] == expected[0].category.slug
+    assert first["excerpt"] == expected[0].excerpt
+    assert "text" not in first
+
+
+def test_api_field_selection(
+        unlogged_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    data = get_json(unlogged_client, "/api/posts/?fields=id,text")
+    assert data["results"] == [{"id": post.id, "text": post.text}]
+    assert data["next"] is None
+    image = get_json(unlogged_client, "/api/posts/?fields=image")
+    assert image["results"] == [{"image": post.image.url}]
+
+    for query in ("fields=id,secret", "limit=0", "limit=x", "cursor=bad"):
+        response = unlogged_client.get(f"/api/posts/?{query}")
+        assert response.status_code == 400, query
+        assert "error" in response.json()
+    assert "от 1 до" in unlogged_client.get(
+        "/api/posts/?limit=abc"
+    ).json()["error"]
+
+
+def test_api_hides_unpublished(
+        mixer: Mixer,
+        unlogged_client: Client,
+        post_with_published_location,
+):
+    unpublished_category = mixer.blend("blog.Category", is_published=False)
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    assert get_json(unlogged_client, "/api/posts/")["results"] == []
+    for url in (
+        f"/api/posts/{post.id}/comments/",
+        f"/api/posts/{post.id + 1}/comments/",
+        f"/api/category/{unpublished_category.slug}/",
+        "/api/category/missing/",
+    ):
+        response = unlogged_client.get(url)
+        assert response.status_code == 404, url
+        assert response["Content-Type"] == "application/json"
+        assert response.json()["error"]
+
+
+def test_api_comments(
+        mixer: Mixer,
+        unlogged_client: Client,
+        post_with_published_location,
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    url = f"/api/posts/{post.id}/comments/"
+    data = get_json(unlogged_client, url + "?limit=2")
+    assert [item["id"] for item in data["results"]] == [
+        comment.id for comment in comments[:2]
+    ]
+    data = get_json(unlogged_client, f"{url}?limit=2&cursor={data['next']}")
+    assert data == {
+        "results": [{
+            "id": comments[2].id,
+            "text": comments[2].text,
+            "author": comments[2].author.username,
+            "created_at": data["results"][0]["created_at"],
+        }],
+        "next": None,
+    }
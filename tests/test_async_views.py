@@ -0,0 +1,104 @@
+import importlib
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.db import connection
+from django.test.client import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches
+
+from blog.paginators import encode_cursor
+from blog.registry import get_registry
+from blog.visibility import get_visibility_epoch
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def reload_urls():
+    import blog.urls
+    import blogicum.urls
+
+    importlib.reload(blog.urls)
+    importlib.reload(blogicum.urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_views(settings):
+    settings.BLOG_ASYNC_VIEWS = True
+    reload_urls()
+    yield
+    settings.BLOG_ASYNC_VIEWS = False
+    reload_urls()
+
+
+def aget(url, client=None, **extra):
+    return async_to_sync((client or AsyncClient()).get)(url, **extra)
+
+
+@pytest.fixture
+def feed_urls(many_posts_with_published_locations):
+    post = many_posts_with_published_locations[0]
+    return (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+
+
+def test_async_feeds_match_sync_feeds(feed_urls, async_views):
+    last = sorted(
+        Client().get("/").context["page_obj"],
+        key=lambda post: (post.pub_date, post.id),
+    )[0]
+    cursor = encode_cursor(last.pub_date, last.id)
+    caches["pages"].clear()
+    for url in feed_urls:
+        for query in ("", "?page=2", f"?before={cursor}", "?fragment=1"):
+            response = aget(url + query)
+            assert response.status_code == 200, url + query
+            assert response.resolver_match.func.view_class.view_is_async
+            assert len(response.context["page_obj"]) == N_PER_PAGE
+        assert aget(url + "?page=3").status_code == 404
+        assert aget(url + "?before=garbage").status_code == 404
+
+
+def test_async_feed_uses_page_cache_and_etag(feed_urls, async_views):
+    get_registry()
+    get_visibility_epoch()
+    response = aget("/")
+    with CaptureQueriesContext(connection) as ctx:
+        cached = aget("/")
+    assert not ctx.captured_queries
+    assert cached.content == response.content
+    assert cached["ETag"] == response["ETag"] == Client().get("/")["ETag"]
+    assert aget(
+        "/", headers={"If-None-Match": response["ETag"]}
+    ).status_code == 304
+    aget("/?utm_source=feed")
+    assert len(caches["pages"]._cache) == 1, (
+        "Асинхронный путь должен кэшировать страницы по тем же правилам."
+    )
+
+
+def test_async_post_detail(
+        mixer, user_client: Client, another_user_client: Client,
+        post_with_published_location, async_views,
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post)
+    response = aget(f"/posts/{post.id}/")
+    assert response.status_code == 200
+    assert response.resolver_match.func.view_class.view_is_async
+    assert response.context["post"] == post
+    assert list(response.context["comments"]) == [comment]
+
+    post.is_published = False
+    post.save()
+    client = AsyncClient()
+    client.cookies = another_user_client.cookies
+    assert aget(f"/posts/{post.id}/", client).status_code == 404
+    client.cookies = user_client.cookies
+    assert aget(f"/posts/{post.id}/", client).status_code == 200
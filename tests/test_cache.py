@@ -0,0 +1,303 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Model
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.cache import bump_version, get_version
+from blog.cache_backends import VersionFileCache
+from blog.utils import get_posts_queryset
+from blog.visibility import EPOCH_KEY, get_visibility_epoch
+
+pytestmark = [pytest.mark.django_db]
+
+POST_CARD_TEMPLATE = "includes/post_card.html"
+
+
+def rendered_cards(response) -> int:
+    return sum(
+        template.name == POST_CARD_TEMPLATE for template in response.templates
+    )
+
+
+def test_post_cards_are_rendered_once(
+        user_client: Client, post_with_published_location
+):
+    assert rendered_cards(user_client.get("/")) == 1
+    response = user_client.get("/")
+    assert rendered_cards(response) == 0, (
+        "Повторный вывод карточки поста должен браться из кэша."
+    )
+    assert post_with_published_location.title in response.content.decode()
+
+
+@pytest.mark.parametrize(
+    "change",
+    ["post", "category", "location", "author", "comment"],
+)
+def test_post_card_is_invalidated(
+        change: str,
+        mixer: Mixer,
+        unlogged_client: Client,
+        post_with_published_location: Model,
+):
+    post = post_with_published_location
+    unlogged_client.get("/")
+    marker = "Изменено"
+    if change == "post":
+        post.title = marker
+        post.save()
+    elif change == "category":
+        post.category.title = marker
+        post.category.save()
+    elif change == "location":
+        post.location.name = marker
+        post.location.save()
+    elif change == "author":
+        post.author.username = marker
+        post.author.save()
+    else:
+        mixer.blend("blog.Comment", post=post)
+        marker = "Комментарии (1)"
+    response = unlogged_client.get("/")
+    assert rendered_cards(response) == 1
+    assert marker in response.content.decode()
+
+
+def test_anonymous_pages_are_cached(
+        unlogged_client: Client,
+        user_client: Client,
+        post_with_published_location: Model,
+        django_assert_num_queries,
+):
+    post = post_with_published_location
+    urls = (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+    for url in urls:
+        first = unlogged_client.get(url)
+        with django_assert_num_queries(0):
+            second = unlogged_client.get(url)
+        assert second.content == first.content
+        assert user_client.get(url).context is not None, (
+            "Страницы авторизованных пользователей не должны кэшироваться."
+        )
+
+
+def test_page_cache_keys_only_feed_params(
+        unlogged_client: Client,
+        post_with_published_location: Model,
+        django_assert_num_queries,
+):
+    unlogged_client.get("/?page=1&fragment=")
+    with django_assert_num_queries(0):
+        unlogged_client.get("/?fragment=&page=1&")
+    for tail in range(3):
+        unlogged_client.get(f"/?utm_source={tail}")
+    assert len(caches["pages"]._cache) == 1, (
+        "Страницы с посторонними параметрами не должны кэшироваться."
+    )
+
+
+def test_anonymous_page_cache_is_invalidated(
+        mixer: Mixer,
+        unlogged_client: Client,
+        post_with_published_location: Model,
+):
+    unlogged_client.get("/")
+    new_post = mixer.blend(
+        "blog.Post",
+        category=post_with_published_location.category,
+        author=post_with_published_location.author,
+    )
+    assert new_post.title in unlogged_client.get("/").content.decode()
+
+
+def test_anonymous_page_cache_expires_on_scheduled_post(
+        mixer: Mixer,
+        unlogged_client: Client,
+        post_with_published_location: Model,
+):
+    scheduled = mixer.blend(
+        "blog.Post",
+        category=post_with_published_location.category,
+        author=post_with_published_location.author,
+        pub_date=timezone.now() + timedelta(seconds=1),
+    )
+    assert scheduled.title not in unlogged_client.get("/").content.decode()
+    time.sleep(1.5)
+    assert scheduled.title in unlogged_client.get("/").content.decode(), (
+        "Отложенная публикация должна появиться в ленте вовремя."
+    )
+
+
+def test_conditional_get_on_post_detail(
+        mixer: Mixer,
+        unlogged_client: Client,
+        post_with_published_location: Model,
+        django_assert_num_queries,
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    # Версии поста создаёт первый успешный ответ, ETag - у следующих.
+    unlogged_client.get(url)
+    etag = unlogged_client.get(url)["ETag"]
+    with django_assert_num_queries(0):
+        response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_post_detail_etag_tracks_only_this_post(
+        mixer: Mixer,
+        unlogged_client: Client,
+        post_with_published_location: Model,
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    # Версии поста создаёт первый успешный ответ, ETag - у следующих.
+    unlogged_client.get(url)
+    etag = unlogged_client.get(url)["ETag"]
+    other = mixer.blend(
+        "blog.Post",
+        category=post.category,
+        location=post.location,
+        author=post.author,
+    )
+    mixer.blend("blog.Comment", post=other)
+    assert unlogged_client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == 304, "Правки других постов не должны сбрасывать ETag."
+    assert unlogged_client.get(
+        f"/posts/{other.id}/", HTTP_IF_NONE_MATCH=etag
+    ).status_code == 200, "У каждого поста должен быть свой ETag."
+    assert unlogged_client.get(
+        f"/posts/{other.id + 1}/", HTTP_IF_NONE_MATCH=etag
+    ).status_code == 404
+
+    post.author.first_name = "Новое имя"
+    post.author.save()
+    assert unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_missing_posts_do_not_create_versions(unlogged_client: Client):
+    backend = caches["shared"]
+    assert unlogged_client.get("/posts/1000/").status_code == 404
+    stored = len(backend._list_cache_files())
+    for pk in range(1001, 1051):
+        assert unlogged_client.get(f"/posts/{pk}/").status_code == 404
+    assert len(backend._list_cache_files()) == stored, (
+        "Запросы несуществующих постов не должны создавать версии."
+    )
+
+
+def test_conditional_get_on_feeds(
+        mixer: Mixer,
+        unlogged_client: Client,
+        user_client: Client,
+        post_with_published_location: Model,
+        django_assert_max_num_queries,
+):
+    post = post_with_published_location
+    for url in (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    ):
+        etag = unlogged_client.get(url)["ETag"]
+        with django_assert_max_num_queries(0):
+            response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert user_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == 200, "ETag должен зависеть от пользователя."
+
+    etag = unlogged_client.get("/")["ETag"]
+    mixer.blend("blog.Post", category=post.category, author=post.author)
+    assert unlogged_client.get(
+        "/", HTTP_IF_NONE_MATCH=etag
+    ).status_code == 200
+
+
+def test_visibility_epoch_advances_only_on_publication(
+        mixer: Mixer,
+        post_with_published_location: Model,
+        django_assert_num_queries,
+):
+    post = post_with_published_location
+    scheduled = mixer.blend(
+        "blog.Post",
+        category=post.category,
+        author=post.author,
+        pub_date=timezone.now() + timedelta(seconds=1),
+    )
+    epoch = get_visibility_epoch()
+    assert epoch.as_of == post.pub_date
+    assert epoch.next_change == scheduled.pub_date
+    with django_assert_num_queries(0):
+        assert get_visibility_epoch() == epoch
+        assert str(get_posts_queryset().query) == str(
+            get_posts_queryset().query
+        ), "Запрос ленты не должен зависеть от текущего времени."
+
+    time.sleep(1.5)
+    with django_assert_num_queries(0):
+        assert get_visibility_epoch().as_of == scheduled.pub_date
+    assert scheduled in get_posts_queryset()
+
+
+def test_versions_survive_many_objects():
+    pages = get_version("pages")
+    bump_version(*(f"post:{pk}" for pk in range(400)))
+    for pk in range(400):
+        get_version(f"post:{pk}")
+    assert get_version("pages") == pages, (
+        "Версии не должны вытесняться из общего кэша."
+    )
+
+
+def test_version_writes_do_not_scan_cache_dir(monkeypatch):
+    backend = caches["shared"]
+    listed = []
+    list_files = backend._list_cache_files
+
+    def spy():
+        listed.append(True)
+        return list_files()
+
+    monkeypatch.setattr(backend, "_list_cache_files", spy)
+    bump_version(*(f"post:{pk}" for pk in range(100)))
+    assert len(listed) < 10, (
+        "Запись версии не должна каждый раз обходить каталог кэша."
+    )
+
+
+def test_version_cache_culls_expired_tokens_first(monkeypatch, tmp_path):
+    monkeypatch.setattr(VersionFileCache, "cull_interval", 1)
+    backend = VersionFileCache(tmp_path, {"OPTIONS": {"MAX_ENTRIES": 3}})
+    backend.set("pages", "token", None)
+    for pk in range(3):
+        backend.set(f"post:{pk}", "token", 0)
+    assert backend.get("pages") == "token"
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_caches_are_reset_again_after_commit(mixer: Mixer):
+    with transaction.atomic():
+        mixer.blend("blog.Post", category__is_published=True)
+        # Другой процесс до фиксации ещё видит старые строки.
+        inside = get_version("taxonomy")
+        get_visibility_epoch()
+    assert get_version("taxonomy") != inside
+    assert caches["shared"].get(EPOCH_KEY) is None
@@ -0,0 +1,76 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Model
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_comment_count(post: Model) -> int:
+    post.refresh_from_db(fields=["comment_count"])
+    return post.comment_count
+
+
+def test_comment_count_follows_comments(
+        mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    assert get_comment_count(post) == 3
+
+    comments[0].delete()
+    assert get_comment_count(post) == 2
+
+    type(comments[0]).objects.filter(post=post).delete()
+    assert get_comment_count(post) == 0
+
+
+def test_comment_count_on_author_cascade(
+        mixer: Mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post)
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    another_user.delete()
+    assert get_comment_count(post) == 1
+
+
+def test_comment_count_views(
+        user_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Текст"})
+    assert get_comment_count(post) == 1
+
+    comment = post.comments.get()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    assert get_comment_count(post) == 0
+
+
+def test_recount_comments_command(
+        mixer: Mixer, unlogged_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=10)
+    assert "Комментарии (10)" in unlogged_client.get("/").content.decode()
+    call_command("recount_comments", batch_size=1, stdout=StringIO())
+    assert get_comment_count(post) == 2
+    assert "Комментарии (2)" in unlogged_client.get("/").content.decode(), (
+        "Исправленный счётчик должен сбрасывать кэш карточки и страницы."
+    )
+
+
+def test_feed_does_not_join_comments(
+        unlogged_client: Client, post_with_published_location
+):
+    with CaptureQueriesContext(connection) as ctx:
+        unlogged_client.get("/")
+    assert not any(
+        "blog_comment" in query["sql"] for query in ctx.captured_queries
+    ), "Лента не должна обращаться к таблице комментариев."
@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+JSON = {"HTTP_ACCEPT": "application/json"}
+
+
+def test_add_comment_returns_fragment(
+        user_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/comment/"
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.post(url, {"text": "Первая\nвторая"}, **JSON)
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    comment = post.comments.get()
+    assert data["id"] == comment.id
+    assert data["comment_count"] == 1
+    assert f'name="comment_{comment.id}"' in data["html"]
+    assert "Первая<br>вторая" in data["html"]
+    assert "<form" not in data["html"]
+    assert not any(
+        '"blog_post"."text"' in query["sql"]
+        for query in ctx.captured_queries
+    ), "Ответ не должен рендерить страницу поста."
+
+    response = user_client.post(url, {"text": "Без JS"})
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == f"/posts/{post.id}/"
+
+
+def test_add_comment_fragment_reports_errors(
+        user_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", {"text": ""}, **JSON
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "text" in response.json()["errors"]
+    assert not post.comments.exists()
+
+
+def test_edit_and_delete_comment_return_fragments(
+        mixer: Mixer, user, user_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post)
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+
+    data = user_client.post(
+        f"/posts/{post.id}/edit_comment/{comment.id}/",
+        {"text": "Исправлено"},
+        **JSON,
+    ).json()
+    assert data["id"] == comment.id
+    assert "Исправлено" in data["html"]
+    assert data["comment_count"] == 2
+
+    data = user_client.post(
+        f"/posts/{post.id}/delete_comment/{comment.id}/", **JSON
+    ).json()
+    assert data == {"id": comment.id, "html": "", "comment_count": 1}
+    assert not post.comments.filter(pk=comment.id).exists()
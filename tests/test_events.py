@@ -0,0 +1,165 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test.client import AsyncClient, Client
+
+from blog import events, views
+from blog.const import COMMENTS_RELEASE_LIMIT
+from blog.events import EventHub, LocalBroker
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def local_broker(tmp_path, monkeypatch, settings):
+    settings.BLOG_ASYNC_VIEWS = True
+    monkeypatch.setattr(events, "EVENTS_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(events, "_hub", EventHub(LocalBroker(tmp_path)))
+    return tmp_path
+
+
+def test_broker_reads_events_after_marker(local_broker):
+    broker = LocalBroker(local_broker)
+    broker.publish("post-1", {"n": 1})
+    marker = broker.marker()
+    broker.publish("post-1", {"n": 2})
+    broker.publish("post-2", {"n": 3})
+    assert [m for _, m in broker.read("post-1", marker)] == [{"n": 2}]
+    assert broker.read("post-3", marker) == []
+
+
+def test_broker_expires_old_events_and_empty_channels(
+        monkeypatch, local_broker
+):
+    broker = LocalBroker(local_broker)
+    broker.publish("post-1", {"n": 1})
+    broker.publish("post-2", {"n": 2})
+    retention = events.EVENTS_RETENTION
+    monkeypatch.setattr(events, "EVENTS_RETENTION", 0)
+    broker._next_expire = 0
+    broker.expire()
+    assert not list(local_broker.iterdir()), (
+        "Старые события и пустые каналы должны удаляться."
+    )
+    monkeypatch.setattr(events, "EVENTS_RETENTION", retention)
+    broker.publish("post-1", {"n": 3})
+    assert [m for _, m in broker.read("post-1", "")] == [{"n": 3}]
+
+
+def test_hub_delivers_events_across_processes(local_broker):
+    # Два хаба над одним каталогом - как два воркера на одном хосте.
+    reader, writer = EventHub(LocalBroker(local_broker)), events.get_hub()
+
+    async def scenario():
+        async with reader.subscribe("post-1") as remote, \
+                writer.subscribe("post-1") as local:
+            await asyncio.sleep(0.02)
+            writer.publish("post-1", {"id": 1})
+            assert await local.get(timeout=1) == {"id": 1}
+            assert await remote.get(timeout=1) == {"id": 1}
+            assert await local.get(timeout=0.05) is None
+        assert not reader._pollers and not writer._pollers
+
+    async_to_sync(scenario)()
+
+
+def read_event(chunk: bytes) -> dict:
+    lines = dict(
+        line.split(": ", 1) for line in chunk.decode().strip().split("\n")
+    )
+    assert lines["event"] == "comment"
+    return json.loads(lines["data"])
+
+
+def test_stream_pushes_new_comments(
+        user_client: Client,
+        django_capture_on_commit_callbacks,
+        post_with_published_location,
+):
+    post = post_with_published_location
+    old_comment = post.comments.create(author=post.author, text="Старый")
+
+    def add_comment():
+        with django_capture_on_commit_callbacks(execute=True):
+            user_client.post(f"/posts/{post.id}/comment/", {"text": "Новый"})
+        return post.comments.latest("pk")
+
+    async def scenario():
+        response = await AsyncClient().get(
+            f"/posts/{post.id}/comments/stream/",
+            headers={"Last-Event-ID": str(old_comment.pk - 1)},
+        )
+        assert response["Content-Type"] == "text/event-stream"
+        chunks = aiter(response.streaming_content)
+        assert (await anext(chunks)).startswith(b"retry:")
+        assert read_event(await anext(chunks))["id"] == old_comment.pk
+        comment = await sync_to_async(add_comment)()
+        event = read_event(await asyncio.wait_for(anext(chunks), 1))
+        await chunks.aclose()
+        assert event["id"] == comment.pk
+        assert "Новый" in event["html"]
+        assert "Удалить комментарий" not in event["html"]
+
+    async_to_sync(scenario)()
+
+
+def test_stream_replays_comments_after_page_render(
+        unlogged_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    shown = post.comments.create(author=post.author, text="Показанный")
+    content = unlogged_client.get(f"/posts/{post.id}/").content.decode()
+    assert f"stream/?after={shown.pk}" in content
+    missed = post.comments.create(author=post.author, text="Пропущенный")
+
+    async def scenario():
+        response = await AsyncClient().get(
+            f"/posts/{post.id}/comments/stream/?after={shown.pk}"
+        )
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)
+        event = read_event(await asyncio.wait_for(anext(chunks), 1))
+        await chunks.aclose()
+        assert event["id"] == missed.pk
+
+    async_to_sync(scenario)()
+
+
+def test_stream_hides_unpublished_post(
+        another_user_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    assert another_user_client.get(
+        f"/posts/{post.id}/comments/stream/"
+    ).status_code == 404
+
+
+def test_stream_is_disabled_under_wsgi(
+        settings, unlogged_client: Client, post_with_published_location
+):
+    settings.BLOG_ASYNC_VIEWS = False
+    post = post_with_published_location
+    assert unlogged_client.get(
+        f"/posts/{post.id}/comments/stream/"
+    ).status_code == 204, "Под WSGI поток должен отключать EventSource."
+    content = unlogged_client.get(f"/posts/{post.id}/").content.decode()
+    assert "data-comment-stream" not in content
+
+    settings.BLOG_ASYNC_VIEWS = True
+    content = unlogged_client.get(f"/posts/{post.id}/").content.decode()
+    assert "data-comment-stream" in content
+
+
+def test_missed_comments_are_capped(mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(COMMENTS_RELEASE_LIMIT + 5).blend(
+        "blog.Comment", post=post
+    )
+    missed = views.CommentStreamView().get_missed_events(post, 0)
+    assert [event["id"] for event in missed] == [
+        comment.pk for comment in comments[:COMMENTS_RELEASE_LIMIT]
+    ]
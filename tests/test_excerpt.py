@@ -0,0 +1,83 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.const import EXCERPT_WORDS
+
+pytestmark = [pytest.mark.django_db]
+
+LONG_TEXT = " ".join(f"слово{i}" for i in range(EXCERPT_WORDS * 2))
+
+
+def test_excerpt_follows_text(post_with_published_location):
+    post = post_with_published_location
+    post.text = LONG_TEXT
+    post.save(update_fields=["text"])
+    post.refresh_from_db(fields=["excerpt"])
+    assert post.excerpt.split()[:EXCERPT_WORDS] == (
+        LONG_TEXT.split()[:EXCERPT_WORDS]
+    )
+    assert post.excerpt.endswith("…")
+    assert "слово" + str(EXCERPT_WORDS) not in post.excerpt
+
+
+def test_feed_does_not_read_post_text(
+        unlogged_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    with CaptureQueriesContext(connection) as ctx:
+        content = unlogged_client.get("/").content.decode("utf-8")
+    assert post.excerpt in content
+    assert not any(
+        '"blog_post"."text"' in query["sql"]
+        for query in ctx.captured_queries
+    ), "Лента не должна читать полный текст постов."
+
+
+def test_backfill_excerpts_command(
+        mixer: Mixer, unlogged_client: Client, post_with_published_location
+):
+    posts = [post_with_published_location] + mixer.cycle(2).blend(
+        "blog.Post", text=LONG_TEXT
+    )
+    model = type(posts[0])
+    model.objects.update(excerpt="")
+    unlogged_client.get("/")
+    call_command("backfill_excerpts", batch_size=1, stdout=StringIO())
+    content = unlogged_client.get("/").content.decode("utf-8")
+    for post in posts:
+        post.refresh_from_db(fields=["text", "excerpt"])
+        assert post.excerpt == model.make_excerpt(post.text)
+        assert post.excerpt in content, (
+            "Карточки, закэшированные до заполнения анонсов, должны"
+            " сбрасываться."
+        )
+
+
+def test_text_html_is_escaped_and_follows_edits(
+        user_client: Client, mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = "<b>жирный</b>\nвторая строка"
+    post.save(update_fields=["text"])
+    post.refresh_from_db(fields=["text_html"])
+    assert post.text_html == (
+        "&lt;b&gt;жирный&lt;/b&gt;<br>вторая строка"
+    )
+    comment = mixer.blend("blog.Comment", post=post, text="a\nb")
+    assert comment.text_html == "a<br>b"
+
+    content = user_client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    assert post.text_html in content
+    assert comment.text_html in content
+    assert "<b>жирный</b>" not in content
+
+    comment.text = "изменённый\nкомментарий"
+    comment.save()
+    content = user_client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    assert "изменённый<br>комментарий" in content
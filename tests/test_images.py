@@ -0,0 +1,279 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+from PIL import ExifTags, Image
+
+from blog import jobs
+from blog.const import IMAGE_JOB_MAX_ATTEMPTS, IMAGE_VARIANT_WIDTHS
+from blog.images import variant_name, variant_names
+from blog.models import ImageJob
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("media_root"),
+]
+
+
+def make_image(width=1600, height=900, name="photo.jpg", color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+def process_jobs():
+    call_command("process_image_jobs", "--once", "--workers=1",
+                 stdout=StringIO())
+
+
+def test_upload_creates_variants(
+        mixer: Mixer, unlogged_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = make_image()
+    post.save()
+    assert post.image_widths == []
+    content = unlogged_client.get("/").content.decode("utf-8")
+    assert f'src="{post.image.url}"' in content, (
+        "Пока копии не готовы, карточка должна выводить оригинал."
+    )
+
+    process_jobs()
+    assert not ImageJob.objects.exists()
+    post.refresh_from_db()
+    assert post.image_widths == list(IMAGE_VARIANT_WIDTHS)
+    for width in IMAGE_VARIANT_WIDTHS:
+        for extension in (None, "webp"):
+            name = variant_name(post.image.name, width, extension)
+            with default_storage.open(name) as variant:
+                assert Image.open(variant).width == width
+
+    content = unlogged_client.get("/").content.decode("utf-8")
+    assert content.count("<picture>") == 1
+    assert 'type="image/webp"' in content
+    assert f"-{IMAGE_VARIANT_WIDTHS[0]}w.webp {IMAGE_VARIANT_WIDTHS[0]}w" in (
+        content
+    )
+    assert 'sizes="' in content
+    assert f'src="{post.image.url}"' not in content
+
+
+def test_small_image_keeps_original(
+        mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = make_image(200, 100)
+    post.save()
+    process_jobs()
+    post.refresh_from_db()
+    assert post.image_widths == []
+    assert "placeholder" in post.image_preview
+
+    stdout = StringIO()
+    call_command("generate_image_variants", stdout=stdout)
+    assert "Обработано изображений: 0" in stdout.getvalue(), (
+        "Обработанное маленькое изображение не нужно декодировать снова."
+    )
+    other = mixer.blend("blog.Post", image=None)
+    other.image = make_image(200, 100)
+    other.save()
+    assert other.image_preview == post.image_preview
+    assert ImageJob.objects.filter(post=other).count() == 0
+
+
+def test_generate_image_variants_command(
+        unlogged_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = make_image(700, 700)
+    post.save()
+    ImageJob.objects.all().delete()
+    assert 'type="image/webp"' not in unlogged_client.get("/").content.decode()
+
+    call_command("generate_image_variants", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_widths == [320, 640]
+    assert 'type="image/webp"' in unlogged_client.get("/").content.decode()
+
+
+def test_failed_job_is_retried_with_backoff(
+        monkeypatch, post_with_published_location
+):
+    post = post_with_published_location
+    ImageJob.objects.all().delete()
+    post.image = make_image()
+    post.save()
+    monkeypatch.setattr(jobs, "prepare_image", lambda name: 1 / 0)
+    with ThreadPoolExecutor(1) as executor:
+        delays = []
+        for _ in range(IMAGE_JOB_MAX_ATTEMPTS):
+            ImageJob.objects.update(run_after=timezone.now())
+            assert jobs.run_jobs(executor, 10) == 1
+            job = ImageJob.objects.get()
+            delays.append(job.run_after - timezone.now())
+    assert job.status == ImageJob.Status.FAILED
+    assert job.attempts == IMAGE_JOB_MAX_ATTEMPTS
+    assert "division by zero" in job.error
+    assert delays[1] > delays[0] * 1.5, "Задержка повтора должна расти."
+    post.refresh_from_db()
+    assert post.image_widths == []
+
+
+def test_job_for_replaced_image_is_dropped(post_with_published_location):
+    post = post_with_published_location
+    ImageJob.objects.all().delete()
+    post.image = make_image(name="old.jpg")
+    post.save()
+    post.image = make_image(name="new.jpg", color=(30, 200, 30))
+    post.save()
+    assert ImageJob.objects.count() == 2
+    process_jobs()
+    assert not ImageJob.objects.exists()
+    post.refresh_from_db()
+    assert post.image_widths == list(IMAGE_VARIANT_WIDTHS)
+
+
+def test_identical_uploads_share_file(
+        mixer: Mixer, media_root, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = make_image(name="first.JPG")
+    post.save()
+    process_jobs()
+    stored = set((media_root / "posts").rglob("*"))
+    other = mixer.blend("blog.Post", image=None)
+    other.image = make_image(name="second.jpg")
+    other.save()
+    assert other.image.name == post.image.name
+    assert other.image.name.endswith(".jpg")
+    assert set((media_root / "posts").rglob("*")) == stored
+    assert not ImageJob.objects.filter(post=other).exists(), (
+        "Копии уже загруженного изображения не нужно нарезать заново."
+    )
+    assert other.image_widths == list(IMAGE_VARIANT_WIDTHS)
+
+
+def test_collect_orphan_images(post_with_published_location):
+    post = post_with_published_location
+    post.image = make_image(color=(0, 0, 200))
+    post.save()
+    process_jobs()
+    orphan = post.image.name
+    post.image = make_image(color=(0, 200, 0))
+    post.save()
+    process_jobs()
+
+    call_command("collect_orphan_images", stdout=StringIO())
+    assert default_storage.exists(orphan), (
+        "Свежие файлы без ссылок удаляются только после паузы."
+    )
+    call_command(
+        "collect_orphan_images", "--grace-period=0", stdout=StringIO()
+    )
+    assert not default_storage.exists(orphan)
+    assert not any(
+        default_storage.exists(name) for name in variant_names(orphan)
+    )
+    assert default_storage.exists(post.image.name)
+    assert all(
+        default_storage.exists(name) for name in variant_names(post.image.name)
+    )
+
+
+def test_card_reserves_space_with_placeholder(
+        unlogged_client: Client, post_with_published_location
+):
+    post = post_with_published_location
+    post.image = make_image(1200, 800)
+    post.save()
+    assert post.image_preview == {"width": 1200, "height": 800}
+    content = unlogged_client.get("/").content.decode("utf-8")
+    assert 'width="1200" height="800" loading="lazy"' in content, (
+        "До нарезки копий карточка должна знать размеры изображения."
+    )
+
+    process_jobs()
+    post.refresh_from_db()
+    color = bytes.fromhex(post.image_preview["color"].lstrip("#"))
+    assert all(abs(a - b) < 8 for a, b in zip(color, (200, 30, 30))), (
+        "Цвет заглушки должен быть средним цветом изображения."
+    )
+    placeholder = post.image_preview["placeholder"]
+    assert placeholder.startswith("data:image/jpeg;base64,")
+    assert len(placeholder) < 1024
+    content = unlogged_client.get("/").content.decode("utf-8")
+    assert f"url({placeholder})" in content
+    assert 'loading="lazy"' in content
+    detail = unlogged_client.get(f"/posts/{post.pk}/").content.decode()
+    assert 'width="1200" height="800"' in detail
+    assert 'loading="lazy"' not in detail, (
+        "Изображение на странице поста загружается сразу."
+    )
+
+
+def test_preview_size_follows_exif_orientation(post_with_published_location):
+    post = post_with_published_location
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    buffer = BytesIO()
+    Image.new("RGB", (1200, 800)).save(buffer, "JPEG", exif=exif)
+    post.image = SimpleUploadedFile("rotated.jpg", buffer.getvalue())
+    post.save()
+    assert post.image_preview == {"width": 800, "height": 1200}
+    process_jobs()
+    post.refresh_from_db()
+    assert post.image_preview["width"] == 800
+
+
+def test_post_is_not_saved_without_its_job(
+        monkeypatch, post_with_published_location
+):
+    post = post_with_published_location
+    old_image = post.image.name
+
+    def broken_create(**kwargs):
+        raise DatabaseError("Очередь недоступна")
+
+    monkeypatch.setattr(ImageJob.objects, "create", broken_create)
+    post.image = make_image()
+    with pytest.raises(DatabaseError):
+        post.save()
+    post.refresh_from_db()
+    assert post.image.name == old_image
+
+
+def test_job_of_deleted_post_fails_quietly(post_with_published_location):
+    post = post_with_published_location
+    ImageJob.objects.all().delete()
+    post.image = make_image()
+    post.save()
+    (job,) = jobs.claim_jobs(10)
+    post.delete()
+    jobs.fail_job(job, OSError("Файл удалён"))
+    assert not ImageJob.objects.exists()
+
+
+class BrokenExecutor:
+
+    def submit(self, *args):
+        raise BrokenProcessPool("Процесс пула убит")
+
+
+def test_broken_pool_postpones_claimed_jobs(post_with_published_location):
+    post = post_with_published_location
+    ImageJob.objects.all().delete()
+    post.image = make_image()
+    post.save()
+    with pytest.raises(BrokenProcessPool):
+        jobs.run_jobs(BrokenExecutor(), 10)
+    job = ImageJob.objects.get()
+    assert job.status == ImageJob.Status.PENDING
+    assert job.run_after > timezone.now()
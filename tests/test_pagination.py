@@ -0,0 +1,232 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.const import COMMENTS_RELEASE_LIMIT
+from blog.paginators import encode_cursor
+from blog.registry import get_registry
+from blog.visibility import get_visibility_epoch
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+CURSOR_LINK = re.compile(r'href="\?((?:before|after)=[-\d.]+)"')
+
+
+def get_start_query():
+    return "before=" + encode_cursor(timezone.now() + timedelta(days=1), 0)
+
+
+def get_cursor_links(response):
+    return CURSOR_LINK.findall(response.content.decode("utf-8"))
+
+
+def test_cursor_pagination_walks_whole_feed(
+        unlogged_client: Client,
+        many_posts_with_published_locations,
+):
+    expected = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    )
+    seen = []
+    get_registry()
+    get_visibility_epoch()
+    query = get_start_query()
+    queries_per_page = set()
+    while query:
+        with CaptureQueriesContext(connection) as ctx:
+            response = unlogged_client.get(f"/?{query}")
+        assert response.status_code == 200
+        queries_per_page.add(len(ctx.captured_queries))
+        assert not any(
+            "COUNT(*)" in q["sql"] for q in ctx.captured_queries
+        ), "Курсорная пагинация не должна выполнять COUNT(*)."
+        seen.extend(response.context["page_obj"])
+        query = next(
+            (link for link in get_cursor_links(response)
+             if link.startswith("before=")),
+            None,
+        )
+    assert seen == expected
+    assert len(queries_per_page) == 1, (
+        "Стоимость страницы не должна зависеть от её глубины."
+    )
+
+
+def test_cursor_pagination_goes_back(
+        unlogged_client: Client,
+        many_posts_with_published_locations,
+):
+    first_page = unlogged_client.get(f"/?{get_start_query()}")
+    older_query = get_cursor_links(first_page)[-1]
+    second_page = unlogged_client.get(f"/?{older_query}")
+    newer_query = next(
+        link for link in get_cursor_links(second_page)
+        if link.startswith("after=")
+    )
+    back = unlogged_client.get(f"/?{newer_query}")
+    assert list(back.context["page_obj"]) == list(
+        first_page.context["page_obj"]
+    )
+    assert len(back.context["page_obj"]) == N_PER_PAGE
+
+
+def test_invalid_cursor_returns_404(unlogged_client: Client):
+    assert unlogged_client.get("/?before=garbage").status_code == 404
+
+
+def count_queries(ctx):
+    return sum("COUNT(*)" in q["sql"] for q in ctx.captured_queries)
+
+
+def test_feed_count_is_cached_until_posts_change(
+        mixer,
+        unlogged_client: Client,
+        many_posts_with_published_locations,
+):
+    with CaptureQueriesContext(connection) as ctx:
+        unlogged_client.get("/")
+    assert count_queries(ctx) == 1
+    with CaptureQueriesContext(connection) as ctx:
+        response = unlogged_client.get("/?page=2")
+    assert count_queries(ctx) == 0, (
+        "Количество постов в ленте должно браться из кэша."
+    )
+    assert response.context["page_obj"].paginator.count == N_PER_PAGE * 2
+
+    post = many_posts_with_published_locations[0]
+    mixer.blend("blog.Post", category=post.category, author=post.author)
+    with CaptureQueriesContext(connection) as ctx:
+        response = unlogged_client.get("/?page=2")
+    assert count_queries(ctx) == 1
+    assert response.context["page_obj"].paginator.count == N_PER_PAGE * 2 + 1
+
+
+def test_page_links_are_windowed(
+        mixer,
+        unlogged_client: Client,
+        user,
+        published_category,
+):
+    mixer.cycle(N_PER_PAGE * 30).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    content = unlogged_client.get("/?page=15").content.decode("utf-8")
+    page_links = re.findall(r'href="\?page=(\d+)"', content)
+    assert len(set(page_links)) < 10, (
+        "Пагинатор должен выводить только соседние страницы, первую"
+        " и последнюю."
+    )
+    assert {"1", "14", "16", "30"} <= set(page_links)
+
+
+def test_comments_are_paginated(
+        mixer,
+        unlogged_client: Client,
+        post_with_published_location,
+):
+    post = post_with_published_location
+    comments = mixer.cycle(COMMENTS_RELEASE_LIMIT + 5).blend(
+        "blog.Comment", post=post
+    )
+    response = unlogged_client.get(f"/posts/{post.id}/")
+    content = response.content.decode("utf-8")
+    shown = re.findall(r'name="comment_(\d+)"', content)
+    assert shown == [str(c.id) for c in comments[:COMMENTS_RELEASE_LIMIT]]
+
+    fragment_url = re.search(
+        r'data-fragment-url="([^"]+)"', content
+    ).group(1).replace("&amp;", "&")
+    with CaptureQueriesContext(connection) as ctx:
+        fragment = unlogged_client.get(fragment_url)
+    assert len(ctx.captured_queries) <= 2
+    fragment_content = fragment.content.decode("utf-8")
+    assert "<html" not in fragment_content
+    assert re.findall(r'name="comment_(\d+)"', fragment_content) == [
+        str(c.id) for c in comments[COMMENTS_RELEASE_LIMIT:]
+    ]
+    assert "data-fragment-url" not in fragment_content
+
+
+def test_comments_fragment_hides_unpublished_post(
+        another_user_client: Client,
+        post_with_published_location,
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    assert another_user_client.get(
+        f"/posts/{post.id}/comments/"
+    ).status_code == 404
+
+
+FEED_MORE = re.compile(r'data-feed-more="([^"]+)"')
+
+
+@pytest.mark.parametrize("feed", ["index", "category", "profile"])
+def test_feed_fragments_walk_whole_feed(
+        feed: str,
+        unlogged_client: Client,
+        many_posts_with_published_locations,
+):
+    post = many_posts_with_published_locations[0]
+    path = {
+        "index": "/",
+        "category": f"/category/{post.category.slug}/",
+        "profile": f"/profile/{post.author.username}/",
+    }[feed]
+    expected = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    )
+    content = unlogged_client.get(path).content.decode("utf-8")
+    seen = list(expected[:N_PER_PAGE])
+    urls = FEED_MORE.findall(content)
+    while urls:
+        (url,) = urls
+        url = url.replace("&amp;", "&")
+        assert url.startswith(f"{path}?fragment=1&before=")
+        response = unlogged_client.get(url)
+        assert response.status_code == 200
+        fragment = response.content.decode("utf-8")
+        assert "<html" not in fragment and "<nav" not in fragment
+        seen.extend(response.context["page_obj"])
+        with CaptureQueriesContext(connection) as ctx:
+            assert unlogged_client.get(url).content.decode() == fragment
+        assert not ctx.captured_queries, (
+            "Фрагмент ленты должен кэшироваться по курсору."
+        )
+        urls = FEED_MORE.findall(fragment)
+    assert seen == expected
+
+
+def test_feed_fragment_continues_posts_with_same_pub_date(
+        mixer,
+        unlogged_client: Client,
+        user,
+        published_category,
+):
+    pub_date = timezone.now().replace(second=0, microsecond=0)
+    posts = mixer.cycle(N_PER_PAGE + 5).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=pub_date,
+    )
+    response = unlogged_client.get("/")
+    seen = list(response.context["page_obj"])
+    (url,) = FEED_MORE.findall(response.content.decode("utf-8"))
+    seen.extend(
+        unlogged_client.get(url.replace("&amp;", "&")).context["page_obj"]
+    )
+    assert seen == sorted(posts, key=lambda post: post.id, reverse=True), (
+        "Посты с одинаковой датой не должны повторяться или пропадать."
+    )
@@ -0,0 +1,175 @@
+import pytest
+from django.db import connection
+from django.db.models import Model
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.registry import get_registry
+from blog.utils import get_posts_queryset
+from blog.visibility import get_visibility_epoch
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+# Запросов на страницу ленты: сессия, пользователь, объект страницы
+# (категория или автор), подсчёт и выборка постов - с небольшим запасом.
+FEED_QUERIES_BUDGET = 7
+
+
+@pytest.fixture
+def warm_caches():
+    """Реестр и эпоха видимости загружаются один раз на процесс."""
+    get_registry()
+    get_visibility_epoch()
+
+
+@pytest.fixture
+def feed_posts(mixer: Mixer, user: Model, published_category):
+    return mixer.cycle(N_PER_PAGE + 1).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location__is_published=True,
+    )
+
+
+@pytest.fixture
+def feed_urls(user: Model, published_category):
+    return (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    )
+
+
+def test_feed_query_budget(
+        another_user_client: Client,
+        feed_posts,
+        feed_urls,
+        warm_caches,
+        django_assert_max_num_queries,
+):
+    for url in feed_urls:
+        with django_assert_max_num_queries(FEED_QUERIES_BUDGET):
+            response = another_user_client.get(url)
+        assert response.status_code == 200, (
+            f"Убедитесь, что страница `{url}` загружается без ошибок."
+        )
+        assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+def test_base_queryset_is_not_evaluated(
+        user: Model,
+        feed_posts,
+        warm_caches,
+        django_assert_num_queries,
+):
+    with django_assert_num_queries(0):
+        queryset = get_posts_queryset(base_queryset=user.posts.all())
+    with django_assert_num_queries(1):
+        page = list(queryset[:N_PER_PAGE])
+    assert len(page) == N_PER_PAGE
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN из SQLite"
+)
+def test_feed_queries_use_indexes(
+        user: Model,
+        published_category,
+        post_with_published_location,
+):
+    plans = {
+        "post_published_feed_idx": get_posts_queryset(),
+        "post_category_feed_idx": get_posts_queryset(
+            base_queryset=published_category.posts.all()
+        ),
+        "post_author_feed_idx": get_posts_queryset(
+            base_queryset=user.posts.all(), apply_filters=False
+        ),
+        "comment_post_created_idx": (
+            post_with_published_location.comments.select_related("author")
+        ),
+    }
+    for index_name, queryset in plans.items():
+        plan = queryset[:N_PER_PAGE].explain()
+        assert f"USING INDEX {index_name}" in plan, (
+            f"Запрос должен использовать индекс `{index_name}`:\n{plan}"
+        )
+        assert "SCAN blog_" not in plan, (
+            f"Запрос не должен сканировать таблицу целиком:\n{plan}"
+        )
+        assert "TEMP B-TREE" not in plan, (
+            f"Сортировка должна выполняться по индексу:\n{plan}"
+        )
+
+
+def post_queries(ctx) -> int:
+    return sum(
+        'FROM "blog_post"' in query["sql"]
+        and not query["sql"].startswith("UPDATE")
+        for query in ctx.captured_queries
+    )
+
+
+@pytest.mark.parametrize(
+    "url_template", ["/posts/{}/", "/posts/{}/edit/", "/posts/{}/delete/"]
+)
+def test_post_object_is_fetched_once(
+        url_template: str,
+        user_client: Client,
+        post_with_published_location,
+        warm_caches,
+):
+    url = url_template.format(post_with_published_location.id)
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get(url)
+    assert response.status_code == 200
+    assert post_queries(ctx) == 1, (
+        f"Страница `{url}` должна загружать публикацию одним запросом."
+    )
+    assert not any(
+        'FROM "blog_category"' in query["sql"]
+        or 'FROM "blog_location"' in query["sql"]
+        for query in ctx.captured_queries
+        if "/edit/" not in url
+    ), "Категория и местоположение не должны запрашиваться отдельно."
+
+
+def test_hidden_post_detail_is_404_for_others(
+        another_user_client: Client,
+        user_client: Client,
+        post_with_published_location,
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    url = f"/posts/{post.id}/"
+    assert another_user_client.get(url).status_code == 404
+    assert user_client.get(url).status_code == 200
+
+
+def test_category_page_uses_registry(
+        unlogged_client: Client,
+        published_category,
+        feed_posts,
+        warm_caches,
+):
+    url = f"/category/{published_category.slug}/"
+    with CaptureQueriesContext(connection) as ctx:
+        response = unlogged_client.get(url)
+    assert response.context["category"] == published_category
+    assert not any(
+        'FROM "blog_category"' in query["sql"]
+        or 'FROM "blog_location"' in query["sql"]
+        for query in ctx.captured_queries
+    ), "Категории и местоположения должны браться из реестра."
+
+    published_category.title = "Новое название"
+    published_category.save()
+    assert "Новое название" in unlogged_client.get(url).content.decode()
+
+    published_category.is_published = False
+    published_category.save()
+    assert unlogged_client.get(url).status_code == 404
@@ -0,0 +1,126 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import (SimpleUploadedFile,
+                                            TemporaryUploadedFile)
+from django.test.client import Client
+from django.utils import timezone
+from PIL import Image
+
+from blog import uploads
+from blog.forms import PostCreateForm
+from blog.models import Post
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("media_root"),
+]
+
+
+def make_upload(image, image_format="PNG", name="photo.png"):
+    buffer = BytesIO()
+    image.save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+def make_bomb():
+    """Маленький PNG, распаковывающийся в 100 мегапикселей."""
+    return make_upload(Image.new("1", (10_000, 10_000)))
+
+
+def post_data(category, image):
+    return {
+        "title": "Заголовок",
+        "text": "Текст",
+        "pub_date": timezone.now().strftime("%Y-%m-%dT%H:%M"),
+        "category": category.pk,
+        "image": image,
+    }
+
+
+def test_upload_within_limits_is_spooled_to_disk(
+        monkeypatch, user_client: Client, published_category
+):
+    received = []
+    open_header = uploads.open_image_header
+
+    def spy(source):
+        received.append(source)
+        return open_header(source)
+
+    monkeypatch.setattr("blog.forms.open_image_header", spy)
+    noise = Image.effect_noise((400, 400), 64).convert("RGB")
+    upload = make_upload(noise)
+    assert len(upload) > 256 * 1024
+    response = user_client.post(
+        "/posts/create/", post_data(published_category, upload)
+    )
+    assert response.status_code == 302
+    assert Post.objects.get().image
+    assert received and isinstance(received[0], TemporaryUploadedFile), (
+        "Большие загрузки должны записываться во временный файл."
+    )
+
+
+@pytest.mark.parametrize(
+    "limits, make_image, error",
+    [
+        (
+            {"IMAGE_UPLOAD_MAX_SIZE": 64 * 1024},
+            lambda: make_upload(
+                Image.effect_noise((400, 400), 64).convert("RGB")
+            ),
+            "Размер файла",
+        ),
+        ({}, make_bomb, "мегапикселей"),
+    ],
+    ids=["size", "pixels"],
+)
+def test_oversized_upload_is_rejected_in_flight(
+        monkeypatch,
+        user_client: Client,
+        published_category,
+        limits,
+        make_image,
+        error,
+):
+    for name, value in limits.items():
+        monkeypatch.setattr(uploads, name, value)
+    chunks = []
+    receive = uploads.ImageLimitsUploadHandler.receive_data_chunk
+
+    def counting(self, raw_data, start):
+        chunks.append(len(raw_data))
+        return receive(self, raw_data, start)
+
+    monkeypatch.setattr(
+        uploads.ImageLimitsUploadHandler, "receive_data_chunk", counting
+    )
+    upload = make_image()
+    response = user_client.post(
+        "/posts/create/", post_data(published_category, upload)
+    )
+    assert response.status_code == 200
+    assert error in response.content.decode("utf-8")
+    assert not Post.objects.exists()
+    assert sum(chunks) < len(upload) or len(chunks) == 1, (
+        "Загрузка должна останавливаться, не дочитывая файл."
+    )
+
+
+def test_form_checks_pixels_from_header(published_category):
+    form = PostCreateForm(
+        data=post_data(published_category, None), files={"image": make_bomb()}
+    )
+    assert not form.is_valid()
+    assert "мегапикселей" in str(form.errors["image"])
+
+
+def test_post_form_still_checks_csrf(user, published_category):
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(user)
+    response = client.post(
+        "/posts/create/", post_data(published_category, make_bomb())
+    )
+    assert response.status_code == 403
+    assert not Post.objects.exists()